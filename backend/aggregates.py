@@ -0,0 +1,182 @@
+import threading
+from collections import deque
+import numpy as np
+from metrics import log_linear_index, log_linear_upper
+from storage import check_zone
+from telemetry_store import get_zone_store
+
+WINDOWS = {'1h': 3600, '24h': 24 * 3600, '7d': 7 * 24 * 3600, '30d': 30 * 24 * 3600}
+KPI_COLUMNS = ['consumption', 'solar_energy']
+PERCENTILES = (50, 90, 99)
+SKETCH_SCALE = 100  # percentile sketch resolution: readings are quantized to 0.01
+SKETCH_MAX_UNITS = 2 ** 40  # ~1e10 at that resolution; larger magnitudes clamp
+
+
+class MonotonicDeque:
+    """Sliding-window min (or max) in amortized O(1) per push."""
+
+    def __init__(self, mode='min'):
+        self._items = deque()
+        self._worse = (lambda old, new: old >= new) if mode == 'min' else (lambda old, new: old <= new)
+
+    def push(self, ts, value):
+        while self._items and self._worse(self._items[-1][1], value):
+            self._items.pop()
+        self._items.append((ts, value))
+
+    def evict(self, cutoff):
+        while self._items and self._items[0][0] <= cutoff:
+            self._items.popleft()
+
+    def value(self):
+        return self._items[0][1] if self._items else None
+
+
+class HistogramSketch:
+    """Log-linear histogram supporting removals, for readings of any scale or sign.
+
+    Magnitudes (in units of ``1/scale``) are bucketed like ``metrics.HdrHistogram``,
+    so percentiles are within ~3% whatever the meter size, with no range to
+    configure. Negative readings fill a mirrored set of buckets below zero.
+    """
+
+    def __init__(self, scale=SKETCH_SCALE, max_units=SKETCH_MAX_UNITS):
+        self.scale, self.max_units = scale, max_units
+        self._zero = log_linear_index(max_units) + 1  # counts[_zero + i] is bucket i >= 0, counts[_zero - 1 - i] is -i
+        self.counts = np.zeros(2 * self._zero, dtype=np.int64)
+        self.total = 0
+
+    def _bin(self, value):
+        units = min(int(round(abs(value) * self.scale)), self.max_units)
+        idx = log_linear_index(units)
+        return self._zero + idx if value >= 0 or units == 0 else self._zero - 1 - idx
+
+    def _value(self, pos):
+        """Midpoint of the bucket at ``pos`` (exact for magnitudes below 2**SUB_BUCKET_BITS units)."""
+        idx = pos - self._zero if pos >= self._zero else self._zero - 1 - pos
+        lower = log_linear_upper(idx - 1) if idx else 0
+        mid = (lower + log_linear_upper(idx) - 1) / 2 / self.scale
+        return mid if pos >= self._zero else -mid
+
+    def add(self, value, k=1):
+        self.counts[self._bin(value)] += k
+        self.total += k
+
+    def remove(self, value):
+        self.add(value, -1)
+
+    def quantile(self, q):
+        if self.total == 0:
+            return None
+        pos = int(np.searchsorted(np.cumsum(self.counts), max(1, q * self.total), side='left'))
+        return round(self._value(pos), 2)
+
+
+class RollingWindow:
+    """Running sum/count, monotonic-deque min/max and a percentile sketch over one time window."""
+
+    def __init__(self, seconds, columns=KPI_COLUMNS):
+        self.seconds = seconds
+        self.columns = columns
+        self._rows = deque()  # (ts, values)
+        self.count = 0
+        self.sums = dict.fromkeys(columns, 0.0)
+        self.mins = {c: MonotonicDeque('min') for c in columns}
+        self.maxs = {c: MonotonicDeque('max') for c in columns}
+        self.sketches = {c: HistogramSketch() for c in columns}
+
+    def push(self, ts, values):
+        self._rows.append((ts, values))
+        self.count += 1
+        for c, v in zip(self.columns, values):
+            self.sums[c] += v
+            self.mins[c].push(ts, v)
+            self.maxs[c].push(ts, v)
+            self.sketches[c].add(v)
+        self.evict(ts - self.seconds)
+
+    def evict(self, cutoff):
+        while self._rows and self._rows[0][0] <= cutoff:
+            _, values = self._rows.popleft()
+            self.count -= 1
+            for c, v in zip(self.columns, values):
+                self.sums[c] -= v
+                self.sketches[c].remove(v)
+        for c in self.columns:
+            self.mins[c].evict(cutoff)
+            self.maxs[c].evict(cutoff)
+
+    def snapshot(self):
+        out = {'rows': self.count}
+        for c in self.columns:
+            lo, hi = self.mins[c].value(), self.maxs[c].value()
+            # A bucket midpoint can fall outside the readings; the exact min/max bound it.
+            pcts = {f'p{p}': self.sketches[c].quantile(p / 100) for p in PERCENTILES}
+            out[c] = {
+                'mean': round(self.sums[c] / self.count, 2) if self.count else None,
+                'sum': round(self.sums[c], 2),
+                'min': lo,
+                'max': hi,
+                **{k: v if v is None else min(max(v, lo), hi) for k, v in pcts.items()}
+            }
+        cons, solar = out['consumption']['mean'], out['solar_energy']['mean']
+        out['renewable_ratio_percent'] = round(solar / (cons + 1) * 100, 2) if self.count else None
+        return out
+
+
+class RollingAggregates:
+    """Multi-resolution KPIs updated on every telemetry append.
+
+    Windows are anchored at the newest reading's timestamp. Each append costs
+    O(1) amortized per window, and a snapshot never looks at history, so the
+    response cost is independent of how much data is stored.
+    """
+
+    def __init__(self, windows=WINDOWS, columns=KPI_COLUMNS):
+        self.windows_spec = windows
+        self.columns = columns
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.windows = {name: RollingWindow(sec, self.columns) for name, sec in self.windows_spec.items()}
+
+    def attach(self, store):
+        """Subscribe to ``store`` appends (replaying the rows it already holds)."""
+        self.store = store
+        store.subscribe(self._on_append)
+        return self
+
+    def _on_append(self, start, end, reset):
+        ts = self.store.epochs()
+        cols = [self.store.column(c) for c in self.columns]
+        with self._lock:
+            if reset:
+                self._reset()
+                # Only rows inside the widest window can affect any KPI.
+                horizon = ts[end - 1] - max(self.windows_spec.values()) if end > start else 0
+                start = start + int(np.searchsorted(ts[start:end], horizon, side='right'))
+            for i in range(start, end):
+                values = tuple(float(col[i]) for col in cols)
+                t = int(ts[i])
+                for w in self.windows.values():
+                    w.push(t, values)
+
+    def snapshot(self):
+        with self._lock:
+            return {name: w.snapshot() for name, w in self.windows.items()}
+
+
+_aggregates = {}
+_aggregates_lock = threading.Lock()
+
+
+def get_aggregates(zone_id=None):
+    """Process-wide rolling aggregates of one zone, attached to its telemetry store."""
+    zone_id = check_zone(zone_id)
+    store = get_zone_store(zone_id)
+    with _aggregates_lock:
+        aggregates = _aggregates.get(zone_id)
+        if aggregates is None:
+            aggregates = _aggregates[zone_id] = RollingAggregates().attach(store)
+    return aggregates
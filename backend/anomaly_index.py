@@ -0,0 +1,117 @@
+import threading
+import numpy as np
+import pandas as pd
+from storage import DEFAULT_ZONE, check_zone
+from telemetry_store import get_zone_store
+from model_registry import get_registry, get_zone_models
+from metrics import ROWS_SCANNED, stage
+
+
+def _score(model, consumption):
+    """IsolationForest decision scores; negative scores are what ``predict`` flags as -1."""
+    ROWS_SCANNED.inc(len(consumption), stage="anomaly_score")
+    with stage("anomaly_score"):
+        return model.decision_function(pd.DataFrame({'consumption': consumption}))
+
+
+class AnomalyIndex:
+    """IsolationForest scores and flags kept row-aligned with the telemetry store.
+
+    Each ``update`` scores only the rows appended since the previous call, so
+    answering "recent anomalies" does not depend on history length. When the
+    model ``source`` reports a new version the full history is rescored in a
+    background thread and swapped in once done; until then the old model
+    keeps serving. ``source()`` returns ``(model, version)``.
+    """
+
+    def __init__(self, store, source=None):
+        self.store = store
+        self.source = source or (lambda: get_registry().get_versioned("anomaly"))
+        self._lock = threading.Lock()
+        self._rescore_thread = None
+        self._model = None
+        self._version = None
+        self._clear()
+
+    def _clear(self):
+        self._scores = np.empty(len(self.store), dtype='float64')
+        self._flagged = []  # row indices with a negative score, in order
+        self._scored = 0
+        self._generation = self.store.generation
+
+    def _extend(self, scores):
+        start = self._scored
+        end = start + len(scores)
+        if end > len(self._scores):
+            grown = np.empty(max(end, 2 * len(self._scores)), dtype='float64')
+            grown[:start] = self._scores[:start]
+            self._scores = grown
+        self._scores[start:end] = scores
+        self._flagged.extend((np.flatnonzero(scores < 0) + start).tolist())
+        self._scored = end
+
+    def _rescore(self, model, version):
+        n = len(self.store)
+        scores = _score(model, self.store.column('consumption')[:n]) if n else np.empty(0)
+        with self._lock:
+            self._model, self._version = model, version
+            self._clear()
+            self._extend(scores)
+
+    def update(self):
+        """Score rows appended since the last call; returns the number of rows scored."""
+        model, version = self.source()
+        if model is None:
+            return 0
+        if self._model is None:
+            self._rescore(model, version)
+        elif version != self._version and not (self._rescore_thread and self._rescore_thread.is_alive()):
+            self._rescore_thread = threading.Thread(target=self._rescore, args=(model, version), daemon=True)
+            self._rescore_thread.start()
+        with self._lock:
+            if self.store.generation != self._generation or len(self.store) < self._scored:
+                self._clear()
+            n = len(self.store)
+            if n <= self._scored:
+                return 0
+            scores = _score(self._model, self.store.column('consumption')[self._scored:n])
+            self._extend(scores)
+            return len(scores)
+
+    @property
+    def ready(self):
+        return self._model is not None
+
+    @property
+    def model_version(self):
+        """Registry version of the model the current scores came from."""
+        return self._version
+
+    def recent(self, k=10):
+        """Row indices of the last ``k`` flagged readings."""
+        with self._lock:
+            return np.asarray(self._flagged[-k:], dtype='int64')
+
+    def scores(self):
+        with self._lock:
+            return self._scores[:self._scored].copy()
+
+
+_indexes = {}
+_index_lock = threading.Lock()
+
+
+def get_anomaly_index(zone_id=None):
+    """Process-wide anomaly index over one zone's telemetry store, updated on every call.
+
+    Zones score with their own anomaly model when they have one, else the global one.
+    """
+    zone_id = check_zone(zone_id)
+    store = get_zone_store(zone_id)
+    with _index_lock:
+        index = _indexes.get(zone_id)
+        if index is None:
+            source = None if zone_id == DEFAULT_ZONE else (lambda: get_zone_models().get_versioned(zone_id, "anomaly"))
+            index = _indexes[zone_id] = AnomalyIndex(store, source)
+    index.update()
+    return index
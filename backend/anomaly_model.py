@@ -1,8 +1,9 @@
-import pandas as pd
 import joblib
-from sklearn.ensemble import IsolationForest
 import os
 from energy_data import load_data
+from features import ANOMALY_FEATURES
+from model_registry import data_range, publish
+from model_train import fit_anomaly
 
 BASE_DIR = os.path.dirname(__file__)
 MODEL_PATH = os.path.join(BASE_DIR, "anomaly_model.pkl")
@@ -10,11 +11,10 @@ MODEL_PATH = os.path.join(BASE_DIR, "anomaly_model.pkl")
 def train_anomaly_model():
     """Train IsolationForest to detect abnormal energy spikes."""
     df = load_data()
-    model = IsolationForest(contamination=0.02, random_state=42)
-    model.fit(df[['consumption']])
+    model = fit_anomaly(df[ANOMALY_FEATURES])
 
-    joblib.dump(model, MODEL_PATH)
-    print(f"💾 Anomaly model trained and saved to {MODEL_PATH}")
+    version = publish(model, MODEL_PATH, {'features': ANOMALY_FEATURES, 'data': data_range(df)})
+    print(f"💾 Anomaly model v{version} trained and saved to {MODEL_PATH}")
     return model
 
 def load_anomaly_model():
@@ -28,7 +28,7 @@ def load_anomaly_model():
 def detect_anomalies(df):
     """Detect abnormal energy consumption values."""
     model = load_anomaly_model()
-    preds = model.predict(df[['consumption']])
+    preds = model.predict(df[ANOMALY_FEATURES])
     df['is_anomaly'] = preds
     anomalies = df[df['is_anomaly'] == -1]
     print(f"⚠ Detected {len(anomalies)} anomalies.")
@@ -0,0 +1,183 @@
+import os
+import queue
+import threading
+from collections import deque
+import numpy as np
+import pandas as pd
+from model_registry import get_zone_models
+from storage import check_zone
+from telemetry_store import get_zone_store
+
+SEASON_WINDOW = 14  # readings kept per hour-of-day slot (two weeks of hourly data)
+GLOBAL_WINDOW = 168  # fallback window while an hour slot is still warming up
+MIN_SAMPLES = 5
+Z_THRESHOLD = float(os.environ.get("ECOWATT_ANOMALY_Z", 4.0))
+EVENT_LOG_SIZE = 1000
+MAD_SCALE = 1.4826  # MAD -> standard deviation for normal data
+MIN_SPREAD = 0.05  # spread floor relative to the baseline; a 14-sample MAD can be very tight
+
+
+class RingWindow:
+    """Fixed-size window of the most recent values; ``median``/``mad`` cost O(size), independent of history."""
+
+    def __init__(self, size):
+        self.values = np.empty(size)
+        self.count = 0
+        self.pos = 0
+
+    def push(self, value):
+        self.values[self.pos] = value
+        self.pos = (self.pos + 1) % len(self.values)
+        self.count = min(self.count + 1, len(self.values))
+
+    def stats(self):
+        window = self.values[:self.count]
+        median = np.median(window)
+        return median, np.median(np.abs(window - median))
+
+
+class EventLog:
+    """Bounded, append-only log of anomaly events with increasing sequence numbers."""
+
+    def __init__(self, maxlen=EVENT_LOG_SIZE):
+        self._events = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self.seq = 0
+
+    def append(self, event):
+        with self._lock:
+            self.seq += 1
+            self._events.append(dict(event, seq=self.seq))
+
+    def since(self, seq=0, limit=None):
+        """Events with a sequence number above ``seq``, oldest first (at most the last ``limit``)."""
+        with self._lock:
+            events = [e for e in self._events if e['seq'] > seq] if seq else list(self._events)
+        return events[-limit:] if limit else events
+
+
+class StreamingDetector:
+    """Scores every appended reading against a seasonal robust baseline.
+
+    The baseline is the median of the last ``SEASON_WINDOW`` readings at the
+    same hour of day (the last ``GLOBAL_WINDOW`` readings until that slot has
+    ``MIN_SAMPLES``); the score is the residual in MAD units. Readings
+    scoring above ``Z_THRESHOLD`` become events in a bounded ``EventLog``.
+    With ``confirm=True`` each appended batch's candidates are handed to a
+    background thread that scores them with the zone's IsolationForest in one
+    call, tags them ``confirmed`` and then logs them, so loading a model never
+    happens inside the telemetry store's lock.
+    """
+
+    def __init__(self, store, zone_id="default", threshold=Z_THRESHOLD, confirm=True, log=None):
+        self.store = store
+        self.zone_id = zone_id
+        self.threshold = threshold
+        self.confirm = confirm
+        self.log = log or EventLog()
+        self._lock = threading.Lock()
+        self._pending = queue.Queue()
+        self._worker = None
+        self._reset()
+
+    def _reset(self):
+        self.slots = [RingWindow(SEASON_WINDOW) for _ in range(24)]
+        self.recent = RingWindow(GLOBAL_WINDOW)
+        self.scored = 0
+        self.flagged = 0
+
+    def attach(self):
+        self.store.subscribe(self._on_append)
+        return self
+
+    def score(self, hour, value):
+        """Robust z-score of ``value`` at ``hour`` and the expected value, or ``(None, None)`` while warming up."""
+        window = self.slots[hour] if self.slots[hour].count >= MIN_SAMPLES else self.recent
+        if window.count < MIN_SAMPLES:
+            return None, None
+        median, mad = window.stats()
+        return (value - median) / max(MAD_SCALE * mad, MIN_SPREAD * abs(median), 1e-9), median
+
+    def _on_append(self, start, end, reset):
+        ts = self.store.epochs()[start:end]
+        values = self.store.column('consumption')[start:end]
+        hours = (ts // 3600) % 24
+        candidates = []
+        with self._lock:
+            if reset:
+                self._reset()
+            for t, h, v in zip(ts.tolist(), hours.tolist(), values.tolist()):
+                z, expected = self.score(h, v)
+                if z is not None and abs(z) > self.threshold:
+                    candidates.append({
+                        'zone_id': self.zone_id,
+                        'timestamp': str(pd.Timestamp(t, unit='s')),
+                        'consumption': round(v, 2),
+                        'expected': round(float(expected), 2),
+                        'score': round(float(z), 2),
+                        'kind': 'spike' if z > 0 else 'drop',
+                        'confirmed': None,
+                    })
+                self.slots[h].push(v)
+                self.recent.push(v)
+            self.scored += end - start
+            self.flagged += len(candidates)
+        if not candidates:
+            return
+        if not self.confirm:
+            self._publish(candidates)
+            return
+        self._pending.put(candidates)
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name=f"ecowatt-anomaly-{self.zone_id}", daemon=True)
+                self._worker.start()
+
+    def _publish(self, candidates):
+        for event in candidates:
+            self.log.append(event)
+
+    def _run(self):
+        while True:
+            candidates = self._pending.get()
+            try:
+                self._confirm(candidates)
+            finally:
+                self._publish(candidates)
+                self._pending.task_done()
+
+    def drain(self):
+        """Block until every queued batch has been confirmed and logged."""
+        self._pending.join()
+
+    def _confirm(self, candidates):
+        """Micro-batch confirmation: one IsolationForest call for all candidates of an append."""
+        model = get_zone_models().get(self.zone_id, "anomaly")
+        if model is None:
+            return
+        try:
+            scores = model.decision_function(pd.DataFrame({'consumption': [c['consumption'] for c in candidates]}))
+        except Exception as e:  # the detector keeps working without confirmation
+            print(f"⚠ Anomaly confirmation failed: {e}")
+            return
+        for event, s in zip(candidates, scores):
+            event['confirmed'] = bool(s < 0)
+
+    def stats(self):
+        return {'zone_id': self.zone_id, 'scored': self.scored, 'flagged': self.flagged,
+                'threshold': self.threshold, 'last_seq': self.log.seq, 'pending': self._pending.qsize()}
+
+
+_detectors = {}
+_detector_lock = threading.Lock()
+
+
+def get_detector(zone_id=None):
+    """Process-wide streaming detector of one zone, attached to its telemetry store."""
+    zone_id = check_zone(zone_id)
+    store = get_zone_store(zone_id)
+    with _detector_lock:
+        detector = _detectors.get(zone_id)
+        if detector is None:
+            detector = _detectors[zone_id] = StreamingDetector(store, zone_id).attach()
+    return detector
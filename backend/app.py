@@ -1,33 +1,82 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
+from typing import Dict, List, Optional, Union
 import pandas as pd
-import joblib
+import asyncio
+import json
 import os
+import threading
+import time
 from datetime import datetime
 import numpy as np
 from rl_optimizer import QLearningOptimizer  # ✅ New RL module
+from rl_env import TelemetryEnv, TelemetryQAgent
+from dispatch import Battery
+from telemetry_store import get_store, get_zone_store, loaded_stores
+from anomaly_index import get_anomaly_index
+from anomaly_stream import get_detector
+from forecast import recursive_forecast
+from fast_forest import load_flat
+from model_registry import DEMAND_PATH, get_registry, get_zone_models
+from concurrency import SingleFlight, run_blocking
+from response_cache import VersionedCache
+from aggregates import get_aggregates
+from rollups import get_rollups
+from features import get_feature_store
+from ingest import flush_all, get_ingestor, ingest_stats as zone_ingest_stats, validate
+from metrics import PROFILE_ON_START, REGISTRY, profiler, stage, timed
+from storage import COLUMNS, DEFAULT_ZONE, check_zone, get_storage, list_zones, to_epoch
 
 # ---------- PATHS ----------
 BASE_DIR = os.path.dirname(__file__)
-CSV_PATH = os.path.join(BASE_DIR, "energy_data.csv")
-MODEL_PATH = os.path.join(BASE_DIR, "demand_model.pkl")
-ANOMALY_PATH = os.path.join(BASE_DIR, "anomaly_model.pkl")
+MODEL_PATH = DEMAND_PATH
+QTABLE_PATH = os.environ.get("ECOWATT_QTABLE", os.path.join(BASE_DIR, "rl_qtable.npz"))
 
 app = FastAPI(title="EcoWatt AI - Adaptive Smart Energy Backend")
+flights = SingleFlight()  # coalesces identical concurrent polls
+response_cache = VersionedCache(ttl=float(os.environ.get("ECOWATT_CACHE_TTL", 30)))
+request_seconds = REGISTRY.histogram("ecowatt_request_seconds", "HTTP request latency by route")
+
+@app.middleware("http")
+async def observe_requests(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    end = time.perf_counter()
+    route = getattr(request.scope.get("route"), "path", "unmatched")  # the template, not the raw URL
+    request_seconds.observe(end - start, route=route, method=request.method)
+    profiler.request_done(route, start, end)
+    return response
 
 # ---------- GLOBAL MODELS ----------
 demand_model = None
 anom_model = None
 optimizer = QLearningOptimizer()  # Adaptive AI Optimizer
-optimizer.train(episodes=300)     # Pre-train RL agent for better demo visuals
+rl_training = {"status": "idle", "source": None, "seconds": None}
+telemetry_agent = None  # Q-learning policy trained on stored telemetry (rl_env)
 
 # ---------- MODEL LOADER ----------
-def load_models():
-    global demand_model, anom_model
-    if demand_model is None and os.path.exists(MODEL_PATH):
-        demand_model = joblib.load(MODEL_PATH)
-    if anom_model is None and os.path.exists(ANOMALY_PATH):
-        anom_model = joblib.load(ANOMALY_PATH)
+INFERENCE_BACKEND = os.environ.get("ECOWATT_INFERENCE", "sklearn")  # sklearn | flat
+registry = get_registry()
+zone_models = get_zone_models()  # per-zone artifacts, LRU-bounded; zones without one share the global model
+_demand_backend = None
+
+def load_models(backend=None):
+    """Point the globals at the registry's active models.
+
+    ``backend='flat'`` serves the demand forest through FlatForest. The
+    registry reloads artifacts when they change on disk, so this is cheap to
+    call per request.
+    """
+    global demand_model, anom_model, _demand_backend
+    backend = backend or INFERENCE_BACKEND
+    if backend != _demand_backend:
+        loader = (lambda p: load_flat(p, mmap_mode=registry.mmap_mode)) if backend == "flat" else None
+        registry.register("demand", MODEL_PATH, loader=loader)
+        _demand_backend = backend
+    demand_model = registry.get("demand")
+    anom_model = registry.get("anomaly")
 
 # ---------- REQUEST BODY ----------
 class PredictRequest(BaseModel):
@@ -37,35 +86,112 @@ class PredictRequest(BaseModel):
     hour: int = None
     lag1: float = None
     lag24: float = None
+    zone_id: Optional[str] = None  # default zone if omitted
+
+# ---------- RL PRE-TRAINING ----------
+def _pretrain_optimizer(episodes=300):
+    """Pre-train the RL agent (for better demo visuals) and snapshot the Q-table."""
+    rl_training.update(status="training", source="background")
+    start = time.perf_counter()
+    optimizer.train(episodes=episodes)
+    rl_training.update(status="ready", seconds=round(time.perf_counter() - start, 3))
+    try:
+        optimizer.save(QTABLE_PATH)
+    except OSError as e:
+        print(f"⚠ Could not save Q-table snapshot: {e}")
+
+def _train_telemetry_agent(episodes=20000):
+    """Train the data-driven policy on the stored history; /optimize switches to it once ready."""
+    global telemetry_agent
+    try:
+        agent = TelemetryQAgent(TelemetryEnv(get_store()))
+    except ValueError as e:
+        print(f"⚠ Telemetry RL agent not trained: {e}")
+        return
+    agent.train(episodes=episodes, seed=42)
+    telemetry_agent = agent
+
+def start_optimizer():
+    """Load the Q-table snapshot if present, otherwise train in a background thread.
+
+    /optimize is served from the current table in the meantime.
+    """
+    threading.Thread(target=_train_telemetry_agent, daemon=True).start()
+    if os.path.exists(QTABLE_PATH):
+        try:
+            optimizer.load(QTABLE_PATH)
+            rl_training.update(status="ready", source="snapshot", seconds=0.0)
+            return
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠ Ignoring Q-table snapshot: {e}")
+    threading.Thread(target=_pretrain_optimizer, daemon=True).start()
 
 # ---------- STARTUP ----------
 @app.on_event("startup")
 def startup_event():
-    load_models()
+    if PROFILE_ON_START:
+        profiler.start()
+    start_optimizer()
+    load_models()  # loads and warms up both models before serving
+    registry.start_watcher()
+    get_store()  # parse energy_data.csv once; later calls only tail new rows
+    get_anomaly_index()  # score the existing history once up front
+    get_aggregates()  # rolling KPI windows, updated on every append from here on
+    get_rollups()  # hourly/daily/weekly tiers for /series
+    get_ingestor()  # buffered, batched appends for /ingest
+    get_feature_store()  # lag/calendar/rolling features, materialized per appended row
+    get_detector()  # flags spikes per reading as rows arrive
     print("✅ Models Loaded | Backend Ready with RL Optimizer")
 
 # ---------- ROOT TEST ----------
 @app.get("/")
-def root():
+async def root():
     return {"message": "EcoWatt AI Backend Active", "optimizer_status": "Running"}
 
 # ---------- DASHBOARD DATA ----------
+def dashboard_version(zone=None):
+    """Data version a zone's dashboard aggregates depend on: telemetry rows plus anomaly model."""
+    store = get_zone_store(zone)
+    index = get_anomaly_index(zone)
+    return (store.generation, len(store), index.model_version or 0)
+
 @app.get("/dashboard_data")
-def dashboard_data():
-    df = pd.read_csv(CSV_PATH)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    last24 = df.tail(24)
+async def dashboard_data(request: Request, zone: Optional[str] = None):
+    try:
+        zone_id = check_zone(zone)
+        version = await run_blocking(dashboard_version, zone_id)
+    except ValueError as e:
+        return {"error": str(e)}
+    key = "dashboard" if zone_id == DEFAULT_ZONE else f"dashboard:{zone_id}"
+    headers = {"ETag": VersionedCache.etag(key, version), "Cache-Control": "no-cache"}
+    if response_cache.matches(request.headers.get("if-none-match"), key, version):
+        return Response(status_code=304, headers=headers)
+
+    body = response_cache.get(key, version)
+    if body is None:
+        # Many dashboards polling at once share a single computation.
+        data = await flights.do(("dashboard_data", zone_id, version), compute_dashboard_data, zone_id)
+        body = json.dumps(jsonable_encoder(data)).encode()
+        response_cache.put(key, version, body)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@timed("dashboard_compute")
+def compute_dashboard_data(zone=None):
+    store = get_zone_store(zone)
 
-    avg_consumption = round(last24['consumption'].mean(), 2)
-    avg_solar = round(last24['solar_energy'].mean(), 2)
+    avg_consumption = round(float(store.tail('consumption', 24).mean()), 2)
+    avg_solar = round(float(store.tail('solar_energy', 24).mean()), 2)
     renewable_ratio = round((avg_solar / (avg_consumption + 1)) * 100, 2)
 
     anomalies = []
-    if os.path.exists(ANOMALY_PATH):
-        anom = joblib.load(ANOMALY_PATH)
-        preds = anom.predict(df[['consumption']])
-        anom_points = df[preds == -1].tail(10)
-        anomalies = anom_points[['timestamp', 'consumption']].to_dict(orient='records')
+    index = get_anomaly_index(zone)
+    if index.ready:
+        idx = index.recent(10)
+        anom_points = pd.DataFrame({
+            'timestamp': store.timestamps()[idx],
+            'consumption': store.column('consumption')[idx]
+        })
+        anomalies = anom_points.to_dict(orient='records')
 
     return {
         "avg_consumption": avg_consumption,
@@ -74,30 +200,491 @@ def dashboard_data():
         "anomalies": anomalies
     }
 
+# ---------- STREAMING ANOMALIES ----------
+SSE_POLL_SECONDS = 0.5
+SSE_HEARTBEAT_SECONDS = 15
+
+@app.get("/anomalies")
+async def anomalies(zone: Optional[str] = None, since: int = 0, limit: int = Query(100, ge=1, le=1000)):
+    """Events from the streaming detector's log after sequence number ``since`` (newest ``limit``)."""
+    try:
+        detector = await run_blocking(get_detector, zone)
+    except ValueError as e:
+        return {"error": str(e)}
+    return {"events": detector.log.since(since, limit), **detector.stats()}
+
+@app.get("/anomalies/stream")
+async def anomalies_stream(request: Request, zone: Optional[str] = None, since: Optional[int] = None):
+    """Server-sent events: one ``anomaly`` event per detection, resumable with ``Last-Event-ID``."""
+    try:
+        detector = await run_blocking(get_detector, zone)
+    except ValueError as e:
+        return {"error": str(e)}
+    last = request.headers.get("last-event-id")
+    cursor = int(last) if last and last.isdigit() else (since if since is not None else detector.log.seq)
+
+    async def events():
+        nonlocal cursor
+        idle = 0.0
+        while not await request.is_disconnected():
+            await run_blocking(get_zone_store, zone)  # pick up rows appended by other writers
+            batch = detector.log.since(cursor)
+            for event in batch:
+                cursor = event["seq"]
+                yield f"id: {cursor}\nevent: anomaly\ndata: {json.dumps(event)}\n\n"
+            idle = 0.0 if batch else idle + SSE_POLL_SECONDS
+            if idle >= SSE_HEARTBEAT_SECONDS:
+                idle = 0.0
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(SSE_POLL_SECONDS)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+# ---------- ROLLING KPIs ----------
+@app.get("/kpis")
+async def kpis(zone: Optional[str] = None):
+    """1h/24h/7d/30d consumption, solar and renewable-ratio KPIs of a zone, served from memory."""
+    try:
+        return await run_blocking(lambda: get_aggregates(zone).snapshot())
+    except ValueError as e:
+        return {"error": str(e)}
+
+# ---------- HISTORICAL SERIES ----------
+def compute_series(start, end, max_points, column, zone=None):
+    rollups = get_rollups(zone)
+    start = int(to_epoch([start])[0]) if start else None
+    end = int(to_epoch([end])[0]) if end else None
+    tier, data = rollups.series(start, end, max_points=max_points, column=column)
+    return {
+        "tier": tier,
+        "points": len(data['timestamp']),
+        "timestamps": np.asarray(data['timestamp']).astype('datetime64[s]').astype(str).tolist(),
+        **{c: {k: np.round(v, 2).tolist() for k, v in data[c].items()} for c in COLUMNS if c in data}
+    }
+
+@app.get("/series")
+async def series(start: Optional[str] = Query(None, alias="from"), end: Optional[str] = Query(None, alias="to"),
+                 max_points: int = Query(500, ge=3, le=10000), column: str = "consumption",
+                 zone: Optional[str] = None):
+    """Historical series from the coarsest-needed rollup tier (hourly/daily/weekly), LTTB-thinned if needed."""
+    if column not in COLUMNS:
+        return {"error": f"Unknown column: {column}"}
+    try:
+        await run_blocking(get_rollups, zone)
+    except ValueError as e:
+        return {"error": str(e)}
+    try:
+        return await run_blocking(compute_series, start, end, max_points, column, zone)
+    except ValueError as e:
+        return {"error": f"Invalid time range: {e}"}
+
+# ---------- TELEMETRY DELTA ----------
+def compute_telemetry(since, zone, limit):
+    zone_id = check_zone(zone)
+    store = get_zone_store(zone_id)
+    ts = store.epochs()
+    cursor = None
+    if since:
+        cursor = int(since) if since.lstrip("-").isdigit() else int(to_epoch([since])[0])
+        start = int(np.searchsorted(ts, cursor, side='right'))
+    else:
+        start = max(0, len(ts) - limit)
+    end = min(len(ts), start + limit)
+    version = dashboard_version(zone_id)
+    return {
+        "zone_id": zone_id,
+        "version": list(version),
+        "generation": store.generation,
+        "rows": len(store),
+        "cursor": int(ts[end - 1]) if end > start else cursor,
+        "more": end < len(ts),
+        "timestamps": ts[start:end].astype('datetime64[s]').astype(str).tolist(),
+        **{c: np.round(store.column(c)[start:end], 2).tolist() for c in COLUMNS}
+    }
+
+@app.get("/telemetry")
+async def telemetry(since: Optional[str] = None, zone: Optional[str] = None,
+                    limit: int = Query(5000, ge=1, le=100000)):
+    """Rows newer than the ``since`` cursor (epoch seconds or timestamp), oldest first.
+
+    Without ``since`` the newest ``limit`` rows are returned. ``cursor`` is
+    the value to send next time; a changed ``generation`` means the data was
+    rewritten and the client should drop what it holds.
+    """
+    try:
+        return await run_blocking(compute_telemetry, since, zone, limit)
+    except ValueError as e:
+        return {"error": str(e)}
+
+# ---------- INGESTION ----------
+NDJSON_CHUNK_ROWS = 5000
+
+def _zone_ingestor(zone_id, rows):
+    """The zone's ingestor; None if the zone has no data yet and ``rows`` hold nothing valid to create it with."""
+    new_zone = not get_storage(zone=zone_id).exists()
+    if new_zone and not len(validate(rows)[0]):
+        return None
+    return get_ingestor(zone_id, create=new_zone)
+
+def _submit_by_zone(records, zone, sync):
+    """Route rows to their zone's ingestor (a row's ``zone_id`` overrides ``zone``)."""
+    groups = {}
+    for r in records:
+        groups.setdefault(r.get("zone_id", zone) if isinstance(r, dict) else zone, []).append(r)
+    result = {"accepted": 0, "rejected": 0, "errors": []}
+    for zone_id, rows in groups.items():
+        try:
+            ingestor = _zone_ingestor(zone_id, rows)
+        except ValueError as e:
+            part = {"accepted": 0, "rejected": len(rows), "errors": [{"row": None, "error": str(e)}]}
+        else:
+            if ingestor is None:
+                part = {"accepted": 0, "rejected": len(rows), "errors": validate(rows)[1][:20]}
+            else:
+                part = ingestor.submit(rows)
+                if sync:
+                    ingestor.flush()
+        result["accepted"] += part["accepted"]
+        result["rejected"] += part["rejected"]
+        result["errors"] = (result["errors"] + [dict(e, zone_id=zone_id) for e in part["errors"]])[:20]
+    return result
+
+async def _submit(records, sync, zone=None):
+    return await run_blocking(_submit_by_zone, records, zone, sync)
+
+@app.post("/ingest")
+async def ingest(request: Request, sync: bool = False, zone: Optional[str] = None):
+    """Bulk ingest a JSON array of readings (or ``{"rows": [...]}``).
+
+    Rows are validated and buffered; they become visible once flushed (batch
+    size or ~1s), or before the response with ``?sync=true``. Each row goes to
+    its ``zone_id`` partition, falling back to ``?zone=`` / the default zone.
+    """
+    try:
+        body = json.loads(await request.body())
+    except ValueError as e:
+        return {"error": f"Invalid JSON: {e}"}
+    records = body.get("rows") if isinstance(body, dict) else body
+    if not isinstance(records, list):
+        return {"error": "Expected a list of rows"}
+    return await _submit(records, sync, zone)
+
+@app.post("/ingest/stream")
+async def ingest_stream(request: Request, sync: bool = False, zone: Optional[str] = None):
+    """Ingest newline-delimited JSON, one reading per line, validated in chunks as it arrives."""
+    totals = {"accepted": 0, "rejected": 0, "errors": []}
+    records, pending = [], b""
+
+    async def submit():
+        result = await _submit(records, False, zone)
+        totals["accepted"] += result["accepted"]
+        totals["rejected"] += result["rejected"]
+        totals["errors"] = (totals["errors"] + result["errors"])[:20]
+        records.clear()
+
+    async for chunk in request.stream():
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                records.append({})  # counted as rejected by validation
+        if len(records) >= NDJSON_CHUNK_ROWS:
+            await submit()
+    if pending.strip():
+        try:
+            records.append(json.loads(pending))
+        except ValueError:
+            records.append({})
+    if records:
+        await submit()
+    if sync:
+        await run_blocking(flush_all)
+    return totals
+
+@app.get("/ingest/stats")
+async def ingest_stats():
+    return zone_ingest_stats()
+
 # ---------- DEMAND PREDICTION ----------
 @app.post("/predict_demand")
-def predict_demand(req: PredictRequest):
+async def predict_demand(req: PredictRequest):
+    return await run_blocking(compute_prediction, req)
+
+def _zone(zone_id):
+    """``(store, demand model)`` of a zone; raises ValueError for bad or unknown zones."""
+    zone_id = check_zone(zone_id)
+    if zone_id == DEFAULT_ZONE:
+        return get_store(), demand_model
+    return get_zone_store(zone_id), zone_models.get(zone_id, "demand")
+
+def _online_features(zone_id=None):
+    """Features of the next reading, from the same feature store the models are trained on."""
+    return get_feature_store(zone_id).online()
+
+def compute_prediction(req: PredictRequest):
     load_models()
-    if demand_model is None:
+    try:
+        _, model = _zone(req.zone_id)
+    except ValueError as e:
+        return {"error": str(e)}
+    if model is None:
         return {"error": "Demand model not trained yet"}
 
     hour = req.hour if req.hour is not None else datetime.now().hour
-    df = pd.read_csv(CSV_PATH).sort_values("timestamp")
-    lag1 = req.lag1 or df['consumption'].iloc[-1]
-    lag24 = req.lag24 or (df['consumption'].iloc[-24] if len(df) >= 24 else lag1)
+    online = _online_features(req.zone_id)
+    lag1 = req.lag1 or online['consumption_lag1']
+    lag24 = req.lag24 or online['consumption_lag24']
 
     features = [[hour, req.temperature, req.solar_energy, req.grid_load, lag1, lag24]]
-    pred = float(demand_model.predict(features)[0])
+    with stage("demand_predict"):
+        pred = float(model.predict(features)[0])
     return {"predicted_consumption": round(pred, 2)}
 
+# ---------- FEATURES ----------
+@app.get("/features")
+async def features(zone: Optional[str] = None, at: Optional[str] = None):
+    """Point-in-time features of the next reading (or of a reading at ``at``), as served to the models."""
+    def lookup():
+        fs = get_feature_store(zone)
+        when = int(to_epoch([at])[0]) if at else None
+        return {"zone_id": check_zone(zone), "rows": len(fs), **fs.online(when)}
+    try:
+        return await run_blocking(lookup)
+    except ValueError as e:
+        return {"error": str(e)}
+
+# ---------- BATCH DEMAND PREDICTION ----------
+BATCH_FIELDS = ['hour', 'temperature', 'solar_energy', 'grid_load', 'lag1', 'lag24']
+
+class BatchPredictRequest(BaseModel):
+    """Either a list of ``rows`` or ``columns`` mapping each field to an equal-length list.
+
+    ``zone_id`` applies to every column row and to rows without their own.
+    """
+    rows: Optional[List[PredictRequest]] = None
+    columns: Optional[Dict[str, List[Optional[float]]]] = None
+    zone_id: Optional[str] = None
+
+def _batch_matrix(req: BatchPredictRequest):
+    """Build one (N, 6) float matrix; missing values become NaN."""
+    if req.rows is not None:
+        return np.array([[np.nan if getattr(r, f) is None else getattr(r, f) for f in BATCH_FIELDS]
+                         for r in req.rows], dtype=float).reshape(-1, len(BATCH_FIELDS))
+    cols = req.columns or {}
+    missing = [f for f in ('temperature', 'solar_energy', 'grid_load') if f not in cols]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+    n = len(cols['temperature'])
+    if any(len(v) != n for v in cols.values()):
+        raise ValueError("All columns must have the same length")
+    return np.column_stack([np.array(cols[f], dtype=float) if f in cols else np.full(n, np.nan)
+                            for f in BATCH_FIELDS]).reshape(-1, len(BATCH_FIELDS))
+
+def _batch_zones(req: BatchPredictRequest, n):
+    """Zone of every row of the batch matrix."""
+    if req.rows is not None:
+        return np.array([check_zone(r.zone_id or req.zone_id) for r in req.rows], dtype=object)
+    return np.full(n, check_zone(req.zone_id), dtype=object)
+
+def _check_required(X):
+    """Only hour and the lags have fallbacks; a null or non-finite reading cannot be predicted."""
+    bad = ~np.isfinite(X[:, 1:4]).all(axis=0)
+    if bad.any():
+        raise ValueError(f"Null or non-finite values in columns: {[f for f, b in zip(BATCH_FIELDS[1:4], bad) if b]}")
+    return X
+
+@app.post("/predict_demand_batch")
+async def predict_demand_batch(req: BatchPredictRequest):
+    """Predict many rows with a single model call; results keep the input order."""
+    return await run_blocking(compute_batch_prediction, req)
+
+def compute_batch_prediction(req: BatchPredictRequest):
+    """One model call per zone in the batch, each with that zone's model and lag fallbacks."""
+    load_models()
+    try:
+        X = _check_required(_batch_matrix(req))
+        zones = _batch_zones(req, len(X))
+        groups = {zone_id: (np.flatnonzero(zones == zone_id), *_zone(zone_id)) for zone_id in dict.fromkeys(zones)}
+    except ValueError as e:
+        return {"error": str(e)}
+    if any(model is None for _, _, model in groups.values()):
+        return {"error": "Demand model not trained yet"}
+    if len(X) == 0:
+        return {"predicted_consumption": []}
+
+    # Same fallbacks as /predict_demand: missing (or zero) lags come from the zone's latest telemetry.
+    hour = X[:, 0]
+    hour[np.isnan(hour)] = datetime.now().hour
+    preds = np.empty(len(X))
+    for zone_id, (rows, _, model) in groups.items():
+        online = _online_features(zone_id)
+        Xz = X[rows]
+        lag1, lag24 = Xz[:, 4], Xz[:, 5]
+        lag1[np.isnan(lag1) | (lag1 == 0)] = online['consumption_lag1']
+        lag24[np.isnan(lag24) | (lag24 == 0)] = online['consumption_lag24']
+        with stage("demand_predict_batch"):
+            preds[rows] = model.predict(Xz)
+    return {"predicted_consumption": np.round(preds, 2).tolist()}
+
+# ---------- MULTI-STEP FORECAST ----------
+@app.get("/forecast")
+async def forecast(horizon: int = Query(24, ge=1, le=168), zone: Optional[str] = None):
+    """Recursive hourly demand forecast; exogenous inputs follow last week's hourly profile."""
+    return await flights.do(("forecast", horizon, zone), compute_forecast, horizon, zone)
+
+def compute_forecast(horizon, zone=None):
+    load_models()
+    try:
+        store, model = _zone(zone)
+    except ValueError as e:
+        return {"error": str(e)}
+    if model is None:
+        return {"error": "Demand model not trained yet"}
+    if len(store) == 0:
+        return {"error": "No telemetry available"}
+
+    with stage("forecast"):
+        fc = recursive_forecast(model, store, horizon=horizon)
+    return {
+        "timestamps": fc['timestamp'].dt.strftime("%Y-%m-%d %H:%M:%S").tolist(),
+        "predicted_consumption": fc['predicted_consumption'].round(2).tolist(),
+        "solar_energy": fc['solar_energy'].round(2).tolist(),
+        "temperature": fc['temperature'].round(2).tolist(),
+        "grid_load": fc['grid_load'].round(2).tolist()
+    }
+
+# ---------- ZONES ----------
+@app.get("/zones")
+async def zones():
+    return {"zones": await run_blocking(list_zones), "models": zone_models.info()}
+
+def zones_version():
+    """Change token of every partition from file metadata alone; nothing is loaded into memory."""
+    storages = [(z, get_storage(zone=z)) for z in list_zones()]
+    return tuple(f"{z}:" + ".".join(map(str, s.signature())) for z, s in storages), storages
+
+def compute_zone_summary(storages, hours=24):
+    """Heatmap metrics of every zone over its last ``hours`` readings, in one vectorized pass.
+
+    Only those rows are read from each partition, so zones nobody has opened stay off the heap.
+    """
+    cons = np.full((len(storages), hours), np.nan)
+    solar = np.full((len(storages), hours), np.nan)
+    for i, (_, storage) in enumerate(storages):
+        recent = storage.recent(hours)
+        c, s = recent['consumption'], recent['solar_energy']
+        cons[i, hours - len(c):], solar[i, hours - len(s):] = c, s
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_cons = np.nanmean(cons, axis=1)
+        avg_solar = np.nanmean(solar, axis=1)
+        peak = np.nanmax(cons, axis=1)
+        renewable = avg_solar / (avg_cons + 1) * 100  # same ratio as /dashboard_data
+        efficiency = renewable / (avg_cons / 100)
+    clean = lambda a: [None if np.isnan(v) else round(float(v), 2) for v in a]
+    return {
+        "zones": [z for z, _ in storages],
+        "rows": [s.rows() for _, s in storages],
+        "avg_consumption": clean(avg_cons),
+        "peak_consumption": clean(peak),
+        "avg_solar": clean(avg_solar),
+        "renewable_ratio_percent": clean(renewable),
+        "efficiency_index": clean(efficiency)
+    }
+
+@app.get("/zones/summary")
+async def zones_summary(request: Request):
+    """Per-zone consumption, renewable share and efficiency index for the city heatmap (last 24 readings)."""
+    version, storages = await run_blocking(zones_version)
+    headers = {"ETag": VersionedCache.etag("zones", version), "Cache-Control": "no-cache"}
+    if response_cache.matches(request.headers.get("if-none-match"), "zones", version):
+        return Response(status_code=304, headers=headers)
+    body = response_cache.get("zones", version)
+    if body is None:
+        data = await flights.do(("zones_summary", version), compute_zone_summary, storages)
+        body = json.dumps(data).encode()
+        response_cache.put("zones", version, body)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# ---------- METRICS ----------
+def _path_bytes(path):
+    if os.path.isdir(path):
+        return sum(e.stat().st_size for e in os.scandir(path) if e.is_file())
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+def _per_zone(fn):
+    return lambda: [({"zone": z}, fn(s)) for z, s in loaded_stores().items()]
+
+# Read at scrape time from the counters the components already keep.
+REGISTRY.gauge("ecowatt_dataset_rows", "Telemetry rows held in memory").set_function(_per_zone(len))
+REGISTRY.gauge("ecowatt_dataset_bytes", "On-disk size of the telemetry data").set_function(
+    _per_zone(lambda s: _path_bytes(s.storage.path)))
+REGISTRY.gauge("ecowatt_rl_training_episodes", "Episodes trained per RL policy").set_function(
+    lambda: [({"policy": "qlearning"}, optimizer.training_episodes)]
+    + ([({"policy": "telemetry"}, telemetry_agent.training_episodes)] if telemetry_agent is not None else []))
+REGISTRY.counter("ecowatt_cache_requests_total", "Dashboard response cache lookups").set_function(
+    lambda: [({"result": k}, response_cache.stats()[k]) for k in ("hits", "misses", "not_modified")])
+REGISTRY.counter("ecowatt_single_flight_total", "Coalescable calls and how many shared another's work").set_function(
+    lambda: [({"result": k}, flights.stats()[k]) for k in ("calls", "coalesced")])
+REGISTRY.counter("ecowatt_model_reloads_total", "Registry model reloads").set_function(lambda: registry.reloads)
+REGISTRY.gauge("ecowatt_ingest_buffered_rows", "Rows waiting in ingest buffers").set_function(
+    lambda: [({"zone": z}, st.get("buffered", 0)) for z, st in zone_ingest_stats().items()])
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of stage latencies, counters and gauges."""
+    return PlainTextResponse(await run_blocking(REGISTRY.render), media_type="text/plain; version=0.0.4")
+
+@app.get("/metrics/profile")
+async def metrics_profile(route: Optional[str] = None):
+    """Folded stacks of slow requests (flamegraph.pl / speedscope input); enable the profiler first."""
+    return PlainTextResponse(profiler.folded(route))
+
+@app.post("/metrics/profile")
+async def toggle_profiler(enabled: bool = True, reset: bool = False):
+    """Start or stop the sampling profiler (``ECOWATT_PROFILE=1`` starts it at boot)."""
+    if reset:
+        profiler.reset()
+    if enabled:
+        profiler.start()
+    else:
+        profiler.stop()
+    return profiler.info()
+
+# ---------- CACHE STATS ----------
+@app.get("/cache_stats")
+async def cache_stats():
+    """Hit/miss/304 counters of the dashboard response cache and request coalescing."""
+    return {"dashboard_data": response_cache.stats(), "single_flight": flights.stats()}
+
+# ---------- MODEL INFO ----------
+@app.get("/models")
+async def models_info():
+    """Active model versions and their training metadata."""
+    return registry.info()
+
 # ---------- RL-BASED OPTIMIZATION ----------
 @app.post("/optimize")
-def optimize_energy(req: PredictRequest):
-    pred_resp = predict_demand(req)
-    predicted = pred_resp.get("predicted_consumption", 0)
+async def optimize_energy(req: PredictRequest):
+    return await run_blocking(compute_optimization, req)
+
+def compute_optimization(req: PredictRequest):
+    # Reuses the in-process prediction path: no extra I/O beyond one telemetry refresh.
+    pred_resp = compute_prediction(req)
+    if "error" in pred_resp:
+        return pred_resp
+    predicted = pred_resp["predicted_consumption"]
     solar = req.solar_energy
 
-    learned = optimizer.optimize(solar, predicted)  # Q-learning decision
+    hour = req.hour if req.hour is not None else datetime.now().hour
+    with stage("rl_optimize"):
+        if telemetry_agent is not None:
+            learned = telemetry_agent.optimize(solar, predicted, hour)  # policy learned from telemetry
+        else:
+            learned = optimizer.optimize(solar, predicted)  # Q-learning decision
     renewable_used = learned['solar_used']
     grid_used = learned['grid_used']
     renewable_ratio = learned['renewable_ratio_percent']
@@ -115,9 +702,69 @@ def optimize_energy(req: PredictRequest):
         "co2_saved_kg": co2_saved
     }
 
+# ---------- DAY-AHEAD DISPATCH PLAN ----------
+class PlanRequest(BaseModel):
+    """Hourly forecasts for one site (a list) or many (a list per site).
+
+    Without ``demand``/``solar`` the zone's /forecast for ``horizon`` hours is planned.
+    """
+    demand: Optional[Union[List[List[float]], List[float]]] = None
+    solar: Optional[Union[List[List[float]], List[float]]] = None
+    start_hour: Optional[int] = None  # hour of day of the first value; next hour if omitted
+    prices: Optional[List[float]] = None  # per-hour tariff; time-of-use by default
+    zone_id: Optional[str] = None
+    horizon: int = 24
+    battery_kwh: float = 100.0
+    battery_rate_kwh: float = 25.0
+    efficiency: float = 0.9
+    initial_soc: float = 0.5
+
+@app.post("/plan")
+async def plan_dispatch(req: PlanRequest):
+    """Day-ahead solar/battery/grid schedule minimizing tariff + CO₂ cost, for any number of sites."""
+    return await run_blocking(compute_plan, req)
+
+def compute_plan(req: PlanRequest):
+    demand, solar, start_hour = req.demand, req.solar, req.start_hour
+    if demand is None or solar is None:
+        if not 1 <= req.horizon <= 168:
+            return {"error": "horizon must be between 1 and 168"}
+        fc = compute_forecast(req.horizon, req.zone_id)
+        if "error" in fc:
+            return fc
+        demand, solar = fc["predicted_consumption"], fc["solar_energy"]
+        start_hour = pd.Timestamp(fc["timestamps"][0]).hour
+    if start_hour is None:
+        start_hour = (datetime.now().hour + 1) % 24
+    try:
+        battery = Battery(req.battery_kwh, req.battery_rate_kwh, req.efficiency, initial_soc=req.initial_soc)
+        with stage("dispatch_plan"):
+            plan = optimizer.plan(solar, demand, start_hour=start_hour, prices=req.prices, battery=battery)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    def r(a):
+        return np.round(a, 2).tolist()
+    return {
+        "sites": len(plan["cost"]),
+        "hours": plan["hours"],
+        "schedule": {k: r(plan[k]) for k in ("solar_used", "solar_to_battery", "battery_charge",
+                                               "battery_discharge", "grid_used", "soc")},
+        "cost": r(plan["cost"]),
+        "baseline_cost": r(plan["baseline_cost"]),
+        "co2_kg": r(plan["co2_kg"]),
+        "co2_saved_kg": r(plan["co2_saved_kg"]),
+        "totals": {
+            "cost": round(float(plan["cost"].sum()), 2),
+            "savings_vs_no_battery": round(float((plan["baseline_cost"] - plan["cost"]).sum()), 2),
+            "co2_kg": round(float(plan["co2_kg"].sum()), 2),
+            "co2_saved_kg": round(float(plan["co2_saved_kg"].sum()), 2),
+        },
+    }
+
 # ---------- RL METRICS (for visualization) ----------
 @app.get("/rl_metrics")
-def rl_metrics():
+async def rl_metrics():
     """Return the current Q-table and average reward per state."""
     q_table = optimizer.q_table.tolist()
     avg_rewards = np.mean(optimizer.q_table, axis=1).tolist()
@@ -125,5 +772,11 @@ def rl_metrics():
         "q_table": q_table,
         "avg_rewards": avg_rewards,
         "actions": optimizer.actions,
-        "episodes_trained": optimizer.training_episodes
+        "episodes_trained": optimizer.training_episodes,
+        "training": {
+            **rl_training,
+            "episodes_target": optimizer.training_target,
+            "progress": round(optimizer.training_episodes / optimizer.training_target, 3)
+            if optimizer.training_target else 1.0
+        }
     }
@@ -0,0 +1,59 @@
+"""Throughput of /predict_demand_batch vs. looped /predict_demand calls.
+
+Run from the backend directory:  python benchmarks/bench_batch_predict.py --rows 500
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+warnings.filterwarnings("ignore")
+
+from fastapi.testclient import TestClient
+import app
+
+
+def make_rows(n, seed=42):
+    rng = np.random.default_rng(seed)
+    return [{
+        "temperature": float(rng.normal(22, 4)),
+        "solar_energy": float(max(0, rng.normal(40, 30))),
+        "grid_load": float(rng.normal(110, 15)),
+        "hour": int(rng.integers(0, 24)),
+    } for _ in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    columns = {k: [r[k] for r in rows] for k in rows[0]}
+    with TestClient(app.app) as client:
+        client.post("/predict_demand", json=rows[0])  # warm-up
+
+        start = time.perf_counter()
+        looped = [client.post("/predict_demand", json=r).json()["predicted_consumption"] for r in rows]
+        t_loop = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batch = client.post("/predict_demand_batch", json={"rows": rows}).json()["predicted_consumption"]
+        t_rows = time.perf_counter() - start
+
+        start = time.perf_counter()
+        columnar = client.post("/predict_demand_batch", json={"columns": columns}).json()["predicted_consumption"]
+        t_cols = time.perf_counter() - start
+
+    assert np.allclose(looped, batch, atol=0.011) and batch == columnar
+    print(f"rows={args.rows}")
+    print(f"looped /predict_demand : {t_loop:8.3f}s  {args.rows / t_loop:10.1f} rows/s")
+    print(f"batch (rows payload)   : {t_rows:8.3f}s  {args.rows / t_rows:10.1f} rows/s  x{t_loop / t_rows:.1f}")
+    print(f"batch (columns payload): {t_cols:8.3f}s  {args.rows / t_cols:10.1f} rows/s  x{t_loop / t_cols:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Single-row and batch latency of FlatForest vs. stock RandomForestRegressor.predict.
+
+Run from the backend directory:  python benchmarks/bench_flat_forest.py
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+import joblib
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+warnings.filterwarnings("ignore")
+
+from app import MODEL_PATH
+from fast_forest import FlatForest
+
+
+def percentiles(fn, X, repeats):
+    times = []
+    for i in range(repeats):
+        row = X[i % len(X):i % len(X) + 1]
+        start = time.perf_counter()
+        fn(row)
+        times.append(time.perf_counter() - start)
+    return np.percentile(np.array(times) * 1e6, [50, 99])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeats", type=int, default=500)
+    parser.add_argument("--batch", type=int, default=10000)
+    args = parser.parse_args()
+
+    forest = joblib.load(MODEL_PATH)
+    start = time.perf_counter()
+    flat = FlatForest(forest)
+    print(f"flatten: {(time.perf_counter() - start) * 1e3:.1f} ms, {len(flat.value)} nodes, depth {flat.max_depth}")
+
+    rng = np.random.default_rng(42)
+    X = np.column_stack([
+        rng.integers(0, 24, args.batch), rng.normal(22, 4, args.batch), rng.uniform(0, 100, args.batch),
+        rng.normal(110, 15, args.batch), rng.normal(120, 25, args.batch), rng.normal(120, 25, args.batch),
+    ])
+    assert np.allclose(forest.predict(X), flat.predict(X), rtol=0, atol=1e-9)
+
+    for name, fn in [("sklearn", forest.predict), ("flat", flat.predict)]:
+        p50, p99 = percentiles(fn, X, args.repeats)
+        start = time.perf_counter()
+        fn(X)
+        batch = time.perf_counter() - start
+        print(f"{name:8s} single-row p50 {p50:8.1f} us  p99 {p99:8.1f} us | batch {args.batch}: {batch * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Ingestion throughput (rows/s) against scratch copies of each storage backend.
+
+Compares the old path (one ``to_csv(mode='a')`` per reading) with the
+batched, fsynced Ingestor, both directly and through the /ingest and
+/ingest/stream endpoints. Nothing under backend/ is written.
+
+Run from the backend directory:  python benchmarks/bench_ingest.py --rows 20000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import warnings
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+warnings.filterwarnings("ignore")
+
+import httpx
+import ingest
+from storage import COLUMNS, TIMESTAMP_FORMAT, CSVStorage, ColumnarStorage
+
+
+def make_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    ts = pd.date_range("2030-01-01", periods=n, freq="s").strftime(TIMESTAMP_FORMAT)
+    values = np.round(rng.uniform(0, 200, size=(n, len(COLUMNS))), 2)
+    return [{"timestamp": t, **dict(zip(COLUMNS, map(float, v)))} for t, v in zip(ts, values)]
+
+
+def fresh(kind, tmp):
+    path = os.path.join(tmp, f"{kind}-{time.perf_counter_ns()}")
+    storage = CSVStorage(path + ".csv") if kind == "csv" else ColumnarStorage(path + ".col")
+    storage.write(pd.DataFrame({"timestamp": pd.to_datetime([]), **{c: [] for c in COLUMNS}}))
+    return storage
+
+
+def bench_per_row_append(storage, rows):
+    start = time.perf_counter()
+    for row in rows:
+        storage.append(pd.DataFrame([row]))
+    return time.perf_counter() - start
+
+
+def bench_ingestor(storage, rows, batch):
+    ing = ingest.Ingestor(storage, batch_rows=batch)
+    start = time.perf_counter()
+    for i in range(0, len(rows), batch):
+        ing.submit(rows[i:i + batch])
+    ing.flush()
+    return time.perf_counter() - start
+
+
+async def bench_http(storage, rows, batch, stream):
+    import app
+    ing = ingest._ingestors["default"] = ingest.Ingestor(storage, batch_rows=batch)
+    transport = httpx.ASGITransport(app=app.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://ecowatt") as client:
+        start = time.perf_counter()
+        if stream:
+            body = "\n".join(json.dumps(r) for r in rows).encode()
+            resp = await client.post("/ingest/stream?sync=true", content=body)
+        else:
+            for i in range(0, len(rows), batch):
+                resp = await client.post("/ingest", json=rows[i:i + batch])
+            await asyncio.get_running_loop().run_in_executor(None, ing.flush)
+        elapsed = time.perf_counter() - start
+        resp.raise_for_status()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--per-row", type=int, default=500, help="rows for the slow one-append-per-row baseline")
+    args = parser.parse_args()
+    rows = make_rows(args.rows)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for kind in ("csv", "columnar"):
+            n = min(args.per_row, args.rows)
+            t = bench_per_row_append(fresh(kind, tmp), rows[:n])
+            print(f"{kind:9s} per-row append      {n / t:12.0f} rows/s")
+            t = bench_ingestor(fresh(kind, tmp), rows, args.batch)
+            print(f"{kind:9s} Ingestor batch={args.batch:<5d} {args.rows / t:12.0f} rows/s")
+            for stream in (False, True):
+                storage = fresh(kind, tmp)
+                t = asyncio.run(bench_http(storage, rows, args.batch, stream))
+                assert len(storage.read()) == args.rows
+                label = "POST /ingest/stream" if stream else "POST /ingest      "
+                print(f"{kind:9s} {label}  {args.rows / t:12.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
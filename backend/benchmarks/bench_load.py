@@ -0,0 +1,68 @@
+"""Concurrent load test of the backend through an in-process ASGI client.
+
+Fires ``--requests`` calls per endpoint with ``--concurrency`` in flight and
+reports p50/p99 latency and throughput. No server or network is needed.
+
+Run from the backend directory:  python benchmarks/bench_load.py --concurrency 32 --requests 500
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import warnings
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+warnings.filterwarnings("ignore")
+
+import httpx
+import app
+
+PAYLOAD = {"temperature": 25.0, "solar_energy": 40.0, "grid_load": 110.0, "hour": 12}
+ENDPOINTS = {
+    "dashboard_data": ("GET", "/dashboard_data", None),
+    "predict_demand": ("POST", "/predict_demand", PAYLOAD),
+    "optimize": ("POST", "/optimize", PAYLOAD),
+}
+
+
+async def hammer(client, method, path, payload, total, concurrency):
+    latencies = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            start = time.perf_counter()
+            resp = await client.request(method, path, json=payload)
+            latencies.append(time.perf_counter() - start)
+            resp.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return np.array(latencies), time.perf_counter() - start
+
+
+async def run(args):
+    app.startup_event()
+    transport = httpx.ASGITransport(app=app.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://ecowatt") as client:
+        for name in args.endpoints:
+            method, path, payload = ENDPOINTS[name]
+            await client.request(method, path, json=payload)  # warm-up
+            lat, wall = await hammer(client, method, path, payload, args.requests, args.concurrency)
+            p50, p99 = np.percentile(lat * 1e3, [50, 99])
+            print(f"{name:15s} p50 {p50:8.2f} ms  p99 {p99:8.2f} ms  {args.requests / wall:8.1f} req/s")
+    print("single-flight:", app.flights.stats())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--endpoints", nargs="+", default=list(ENDPOINTS), choices=list(ENDPOINTS))
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Episodes/s of QLearningOptimizer.train (Python loop) vs. train_batched.
+
+Run from the backend directory:  python benchmarks/bench_rl_train.py --episodes 2000 --batched-episodes 1000000
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rl_optimizer import QLearningOptimizer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--episodes", type=int, default=2000, help="episodes for the looped trainer")
+    parser.add_argument("--batched-episodes", type=int, default=200000)
+    parser.add_argument("--n-envs", type=int, default=4096)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    np.random.seed(args.seed)
+    looped = QLearningOptimizer()
+    start = time.perf_counter()
+    looped.train(episodes=args.episodes)
+    t_loop = time.perf_counter() - start
+
+    batched = QLearningOptimizer()
+    start = time.perf_counter()
+    batched.train_batched(episodes=args.batched_episodes, n_envs=args.n_envs, seed=args.seed)
+    t_batch = time.perf_counter() - start
+
+    again = QLearningOptimizer().train_batched(episodes=args.batched_episodes, n_envs=args.n_envs, seed=args.seed)
+    assert np.array_equal(batched.q_table, again), "seeded batched runs must be reproducible"
+
+    loop_rate = args.episodes / t_loop
+    batch_rate = args.batched_episodes / t_batch
+    print(f"looped  : {args.episodes:>9d} episodes in {t_loop:7.3f}s  {loop_rate:12.0f} episodes/s")
+    print(f"batched : {args.batched_episodes:>9d} episodes in {t_batch:7.3f}s  {batch_rate:12.0f} episodes/s  x{batch_rate / loop_rate:.0f}")
+    print("greedy policy (looped) :", [looped.actions[a] for a in np.argmax(looped.q_table, axis=1)])
+    print("greedy policy (batched):", [batched.actions[a] for a in np.argmax(batched.q_table, axis=1)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Time-to-first-request of the backend, with and without a Q-table snapshot.
+
+Each measurement runs in a fresh interpreter: import app, run the startup
+hooks and serve one /optimize request through an in-process client.
+
+Run from the backend directory:  python benchmarks/bench_startup.py --runs 3
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from rl_optimizer import QLearningOptimizer
+
+PROBE = r"""
+import time, json, warnings
+t0 = time.perf_counter()
+warnings.filterwarnings("ignore")
+from fastapi.testclient import TestClient
+import app
+t_import = time.perf_counter()
+with TestClient(app.app) as client:
+    t_startup = time.perf_counter()
+    client.post("/optimize", json={"temperature": 25, "solar_energy": 40, "grid_load": 110, "hour": 12}).raise_for_status()
+    t_first = time.perf_counter()
+    status = client.get("/rl_metrics").json()["training"]["status"]
+print(json.dumps({"import": t_import - t0, "startup": t_startup - t_import,
+                  "first_request": t_first - t0, "rl_status_at_first_request": status}))
+"""
+
+
+def probe(qtable_path):
+    env = dict(os.environ, ECOWATT_QTABLE=qtable_path)
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        qtable = os.path.join(tmp, "rl_qtable.npz")
+        for label in ["cold (no snapshot)", "warm (snapshot)"]:
+            if label.startswith("warm"):
+                optimizer = QLearningOptimizer()
+                optimizer.train(episodes=300)
+                optimizer.save(qtable)
+            results = []
+            for _ in range(args.runs):
+                if label.startswith("cold") and os.path.exists(qtable):
+                    os.remove(qtable)
+                results.append(probe(qtable))
+            best = min(results, key=lambda r: r["first_request"])
+            print(f"{label:20s} import {best['import']:.3f}s  startup {best['startup']:.3f}s  "
+                  f"time-to-first-request {best['first_request']:.3f}s  rl={best['rl_status_at_first_request']}")
+
+
+if __name__ == "__main__":
+    main()
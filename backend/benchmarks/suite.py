@@ -0,0 +1,302 @@
+"""Reproducible benchmark suite: generation, CSV load, features, training, inference, RL and API latency.
+
+Every dataset is generated with a fixed seed and end date into a temporary
+directory, so runs are comparable across commits and nothing under backend/
+is touched. API latency is measured through an in-process ASGI client in a
+fresh interpreter pointed at the generated data (``ECOWATT_DATA``); no
+server or network is needed. ``/dashboard_data`` is timed twice: as clients
+see it (served from the version-keyed response cache) and with the cache
+disabled, so a slower ``compute_dashboard_data`` shows up as a regression.
+
+Run from the backend directory:
+    python benchmarks/suite.py                                   # default datasets, print results
+    python benchmarks/suite.py --datasets 2w 1y                  # a quicker subset
+    python benchmarks/suite.py --save benchmarks/baseline.json   # record a baseline
+    python benchmarks/suite.py --compare benchmarks/baseline.json --tolerance 0.25
+
+``--compare`` exits non-zero when a metric is worse than the baseline by more
+than ``--tolerance``, or when a baseline metric was not measured at all. Baselines are machine-specific (see their
+``environment``); on shared or single-core boxes raise ``--repeat``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+warnings.filterwarnings("ignore")
+
+SEED = 42
+END = "2025-01-01"  # fixed so every run generates identical data
+DATASETS = {
+    "2w": {"days": 14, "sites": 1},
+    "1y": {"days": 365, "sites": 1},
+    "5y": {"days": 5 * 365, "sites": 1},
+    "1y-10sites": {"days": 365, "sites": 10},
+}
+DEFAULT_DATASETS = ["2w", "1y", "5y", "1y-10sites"]
+PAYLOAD = {"temperature": 25.0, "solar_energy": 40.0, "grid_load": 110.0, "hour": 12}
+NOISE_FLOOR_SECONDS = 0.005  # timing changes smaller than this are never reported as regressions
+
+
+def best_of(fn, repeat):
+    """Fastest wall time of ``repeat`` calls and the last call's result."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def percentiles_ms(samples):
+    p50, p99 = np.percentile(np.asarray(samples) * 1e3, [50, 99])
+    return round(float(p50), 4), round(float(p99), 4)
+
+
+# ---------- DATA PIPELINE ----------
+def bench_dataset(name, spec, tmp, args):
+    from generator import generate, site_storage, write_generated
+    from features import build_features
+
+    out = {}
+    days, sites = spec["days"], spec["sites"]
+    chunks = lambda: generate(days=days, sites=sites, seed=SEED, end=END)
+    t, frames = best_of(lambda: [df for _, df in chunks()], args.repeat)
+    rows = sum(len(df) for df in frames)
+    out.update(rows=rows, generate_seconds=t, generate_rows_per_s=rows / t)
+
+    out_dir = os.path.join(tmp, name)
+    storage_for = lambda site: site_storage(out_dir, site, "csv")
+    t, _ = best_of(lambda: write_generated(chunks(), storage_for), 1)
+    out.update(csv_write_seconds=t)
+    t, loaded = best_of(lambda: [storage_for(s).read() for s in range(sites)], args.repeat)
+    out.update(csv_load_seconds=t, csv_load_rows_per_s=rows / t)
+
+    t, featured = best_of(lambda: [build_features(df) for df in loaded], args.repeat)
+    out.update(features_seconds=t, features_rows_per_s=rows / t)
+
+    if sites == 1:
+        out.update(bench_models(featured[0], args))
+        out.update(bench_telemetry_rl(storage_for(0), args))
+        if not args.skip_api:
+            out.update(bench_api(storage_for(0).path, args))
+    return out
+
+
+def bench_models(df, args):
+    from features import training_matrix
+    from model_train import fit_anomaly, fit_demand
+
+    X, y = training_matrix(df)
+    split = int(len(df) * 0.8)
+    out = {}
+    t, model = best_of(lambda: fit_demand(X.iloc[:split], y.iloc[:split], args.n_jobs), args.repeat)
+    out["train_demand_seconds"] = t
+    t, _ = best_of(lambda: fit_anomaly(df[["consumption"]], args.n_jobs), args.repeat)
+    out["train_anomaly_seconds"] = t
+
+    row = X.iloc[[0]]
+    model.predict(row)  # warm-up
+    lat = []
+    for _ in range(args.requests):
+        start = time.perf_counter()
+        model.predict(row)
+        lat.append(time.perf_counter() - start)
+    out["predict_single_p50_ms"], out["predict_single_p99_ms"] = percentiles_ms(lat)
+    t, _ = best_of(lambda: model.predict(X), args.repeat)
+    out["predict_batch_rows_per_s"] = len(X) / t
+    return out
+
+
+# ---------- REINFORCEMENT LEARNING ----------
+def bench_rl(args):
+    from rl_optimizer import QLearningOptimizer
+
+    episodes = args.rl_episodes
+    np.random.seed(SEED)
+    t, _ = best_of(lambda: QLearningOptimizer().train(episodes=episodes), args.repeat)
+    out = {"qlearning_steps_per_s": episodes * 24 / t}
+    t, _ = best_of(lambda: QLearningOptimizer().train_batched(episodes=episodes * 100, seed=SEED), args.repeat)
+    out["qlearning_batched_steps_per_s"] = episodes * 100 * 24 / t
+    return out
+
+
+def bench_telemetry_rl(storage, args):
+    from rl_env import TelemetryEnv, TelemetryQAgent
+    from telemetry_store import TelemetryStore
+
+    store = TelemetryStore(storage)
+    store.refresh()
+    env = TelemetryEnv(store)
+    episodes = args.rl_episodes * 100
+    t, _ = best_of(lambda: TelemetryQAgent(env).train(episodes=episodes, seed=SEED), args.repeat)
+    return {"telemetry_rl_steps_per_s": episodes * env.window / t}
+
+
+# ---------- API LATENCY ----------
+def bench_api(csv_path, args):
+    """Run ``api_worker`` in a fresh interpreter so the app's singletons load the generated data."""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, ECOWATT_DATA=csv_path, ECOWATT_QTABLE=os.path.join(tmp, "rl_qtable.npz"))
+        cmd = [sys.executable, os.path.abspath(__file__), "--api-worker", "--requests", str(args.requests)]
+        proc = subprocess.run(cmd, cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:], file=sys.stderr)
+        raise RuntimeError("API benchmark worker failed")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+async def _api_latencies(requests):
+    import httpx
+    import app
+
+    app.startup_event()
+    deadline = time.monotonic() + 300
+    while (app.telemetry_agent is None or app.rl_training["status"] != "ready") and time.monotonic() < deadline:
+        await asyncio.sleep(0.1)  # let background RL training finish so it does not skew latencies
+    out = {}
+    ttl = app.response_cache.ttl
+    transport = httpx.ASGITransport(app=app.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://ecowatt") as client:
+        for name, method, path, payload, cache_ttl in [
+                ("dashboard_data", "GET", "/dashboard_data", None, ttl),  # cache hits, as polling clients see it
+                ("dashboard_data_uncached", "GET", "/dashboard_data", None, 0),  # every request recomputes
+                ("optimize", "POST", "/optimize", PAYLOAD, ttl)]:
+            app.response_cache.ttl = cache_ttl
+            (await client.request(method, path, json=payload)).raise_for_status()  # warm-up
+            lat = []
+            for _ in range(requests):
+                start = time.perf_counter()
+                resp = await client.request(method, path, json=payload)
+                lat.append(time.perf_counter() - start)
+                resp.raise_for_status()
+            out[f"api_{name}_p50_ms"], out[f"api_{name}_p99_ms"] = percentiles_ms(lat)
+    app.response_cache.ttl = ttl
+    return out
+
+
+def api_worker(args):
+    result = asyncio.run(_api_latencies(args.requests))
+    sys.stdout.flush()
+    print(json.dumps(result))
+
+
+# ---------- BASELINE ----------
+def environment():
+    import sklearn
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {"created": datetime.now().isoformat(timespec="seconds"), "commit": commit,
+            "python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "sklearn": sklearn.__version__, "platform": platform.platform(), "cpus": os.cpu_count(),
+            "seed": SEED}
+
+
+def direction(metric):
+    """+1 if higher is better, -1 if lower is better, 0 for informational values."""
+    if metric.endswith("_per_s"):
+        return 1
+    if metric.endswith(("_seconds", "_ms")):
+        return -1
+    return 0
+
+
+def compare(baseline, current, tolerance, not_run=()):
+    """Print a metric-by-metric comparison; returns the regressed (or no longer measured) metric names.
+
+    Baseline groups in ``not_run`` (datasets left out of this run) are skipped.
+    """
+    regressions = []
+    print(f"{'metric':48s} {'baseline':>12s} {'current':>12s} {'change':>8s}")
+    for group, metrics in baseline["results"].items():
+        if group in not_run:
+            print(f"{group:48s} {'not run':>12s}")
+            continue
+        for metric, old in metrics.items():
+            if direction(metric) and metric not in current["results"].get(group, {}):
+                print(f"{group + '.' + metric:48s} {old:12.4g} {'-':>12s} {'':8s}  MISSING")
+                regressions.append(f"{group}.{metric} (missing)")
+    for group, metrics in current["results"].items():
+        for metric, value in metrics.items():
+            old = baseline["results"].get(group, {}).get(metric)
+            sign = direction(metric)
+            if old is None or sign == 0 or not old:
+                continue
+            change = (value - old) / old
+            if metric.endswith("_ms"):
+                delta = abs(value - old) / 1e3
+            elif metric.endswith("rows_per_s") and metrics.get("rows"):
+                delta = abs(metrics["rows"] / value - metrics["rows"] / old)  # implied duration change
+            elif metric.endswith("_per_s"):
+                delta = float("inf")
+            else:
+                delta = abs(value - old)
+            regressed = -change * sign > tolerance and delta > NOISE_FLOOR_SECONDS
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{group + '.' + metric:48s} {old:12.4g} {value:12.4g} {change:+8.1%}{flag}")
+            if regressed:
+                regressions.append(f"{group}.{metric}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EcoWatt benchmark suite")
+    parser.add_argument("--datasets", nargs="+", default=DEFAULT_DATASETS, choices=list(DATASETS))
+    parser.add_argument("--repeat", type=int, default=3, help="runs per cheap measurement (best is kept)")
+    parser.add_argument("--requests", type=int, default=500, help="samples per latency measurement")
+    parser.add_argument("--rl-episodes", type=int, default=200)
+    parser.add_argument("--n-jobs", type=int, default=-1, help="cores per forest fit")
+    parser.add_argument("--skip-api", action="store_true")
+    parser.add_argument("--save", metavar="PATH", help="write results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--api-worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.api_worker:
+        return api_worker(args)
+
+    report = {"environment": environment(), "results": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in args.datasets:
+            start = time.perf_counter()
+            report["results"][name] = bench_dataset(name, DATASETS[name], tmp, args)
+            print(f"⏱ {name}: {time.perf_counter() - start:.1f}s")
+    report["results"]["rl"] = bench_rl(args)
+    for group in report["results"].values():
+        for k, v in group.items():
+            group[k] = round(v, 6) if isinstance(v, float) else v
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Saved baseline: {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        not_run = [g for g in baseline["results"] if g in DATASETS and g not in args.datasets]
+        regressions = compare(baseline, report, args.tolerance, not_run)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"✅ No regressions beyond {args.tolerance:.0%}")
+    elif not args.save:
+        print(json.dumps(report["results"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
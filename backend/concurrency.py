@@ -0,0 +1,46 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = int(os.environ.get("ECOWATT_WORKERS", min(8, (os.cpu_count() or 1) + 2)))
+
+# Bounded pool for blocking disk I/O and model calls, separate from the
+# default threadpool so a burst of heavy requests cannot starve it.
+executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="ecowatt")
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """Run ``fn(*args, **kwargs)`` on the bounded executor without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+
+
+class SingleFlight:
+    """Coalesce identical in-flight calls into one computation.
+
+    The first caller for a key runs ``fn`` on the executor; callers arriving
+    with the same key while it is running await the same future instead of
+    starting their own. The key is dropped once the result is delivered, so
+    later calls compute fresh values.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn, *args, **kwargs):
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(run_blocking(fn, *args, **kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._inflight.pop(key, None) if self._inflight.get(key) is t else None)
+        else:
+            self.coalesced += 1
+        # Shielded so a disconnecting caller does not cancel the work others wait on.
+        return await asyncio.shield(task)
+
+    def stats(self):
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._inflight)}
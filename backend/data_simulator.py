@@ -1,39 +1,18 @@
-import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
 import time
-import os
+from storage import get_storage
+from generator import generate_to_storage
+from ingest import Ingestor
 
-CSV_PATH = os.path.join(os.path.dirname(__file__), "energy_data.csv")
-
-def generate_initial(days=14):
-    rows = []
-    now = datetime.now()
-    start = now - timedelta(days=days)
-    ts = start
-
-    while ts <= now:
-        hour = ts.hour
-        base = 120 + 40 * np.sin((hour / 24) * 2 * np.pi) + np.random.normal(0, 5)
-        temp = 20 + 10 * np.sin((ts.timetuple().tm_yday / 365.0) * 2 * np.pi) + np.random.normal(0, 2)
-        solar = max(0, 100 * np.sin(((hour - 6) / 12) * np.pi) + np.random.normal(0, 8))
-        grid_load = base - solar * 0.3 + np.random.normal(0, 3)
-        consumption = base + np.random.normal(0, 6)
-        rows.append({
-            "timestamp": ts.strftime("%Y-%m-%d %H:%M:%S"),
-            "temperature": round(temp, 2),
-            "solar_energy": round(solar, 2),
-            "grid_load": round(grid_load, 2),
-            "consumption": round(consumption, 2)
-        })
-        ts += timedelta(hours=1)
-
-    df = pd.DataFrame(rows)
-    df.to_csv(CSV_PATH, index=False)
-    print(f"✅ Initial data generated: {CSV_PATH}")
+def generate_initial(days=14, seed=None):
+    storage = generate_to_storage(days=days, seed=seed)
+    print(f"✅ Initial data generated: {storage.path}")
 
 def run_live_append(interval_seconds=5):
     print("🌍 Live simulation running... Press Ctrl+C to stop.")
+    # Every reading is flushed as its own durable batch, so the backend never sees a partial row.
+    ingestor = Ingestor(get_storage(), batch_rows=1)
     while True:
         try:
             now = datetime.now()
@@ -50,8 +29,7 @@ def run_live_append(interval_seconds=5):
                 "grid_load": round(grid_load, 2),
                 "consumption": round(consumption, 2)
             }
-            df_new = pd.DataFrame([row])
-            df_new.to_csv(CSV_PATH, mode='a', header=not os.path.exists(CSV_PATH), index=False)
+            ingestor.submit([row])
             print(f"[+] Added: {row['timestamp']} | consumption={row['consumption']:.2f} | solar={row['solar_energy']:.2f}")
             time.sleep(interval_seconds)
         except KeyboardInterrupt:
@@ -59,7 +37,7 @@ def run_live_append(interval_seconds=5):
             break
 
 if __name__ == "__main__":
-    if not os.path.exists(CSV_PATH):
+    if not get_storage().exists():
         generate_initial(days=14)
     run_live_append(interval_seconds=5)
 
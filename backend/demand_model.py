@@ -1,36 +1,30 @@
-import pandas as pd
 import joblib
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error
 import os
-from energy_data import load_data
+from energy_data import ensure_data
+from features import FEATURES, training_frame, training_matrix
+from model_registry import data_range, publish
+from model_train import fit_demand
 
 BASE_DIR = os.path.dirname(__file__)
 MODEL_PATH = os.path.join(BASE_DIR, "demand_model.pkl")
 
-def train_demand_model():
+def train_demand_model(n_jobs=-1):
     """Train RandomForest model for energy demand prediction."""
-    df = load_data()
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    df = df.sort_values('timestamp')
-    df['hour'] = df['timestamp'].dt.hour
-    df['consumption_lag1'] = df['consumption'].shift(1).fillna(method='bfill')
-    df['consumption_lag24'] = df['consumption'].shift(24).fillna(method='bfill')
+    ensure_data()
+    df = training_frame()
+    X, y = training_matrix(df)
+    split = int(len(df) * 0.8)
+    model = fit_demand(X.iloc[:split], y.iloc[:split], n_jobs)
+    preds = model.predict(X.iloc[split:])
 
-    X = df[['hour', 'temperature', 'solar_energy', 'grid_load', 'consumption_lag1', 'consumption_lag24']]
-    y = df['consumption']
-
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)
-    model = RandomForestRegressor(n_estimators=100, random_state=42)
-    model.fit(X_train, y_train)
-    preds = model.predict(X_test)
-
-    mse = mean_squared_error(y_test, preds)
+    mse = mean_squared_error(y.iloc[split:], preds)
     print(f"✅ Demand Model trained. MSE: {mse:.3f}")
 
-    joblib.dump(model, MODEL_PATH)
-    print(f"💾 Model saved to {MODEL_PATH}")
+    metadata = {'mode': 'full', 'test_mse': float(mse), 'features': FEATURES, 'data': data_range(df),
+                'trained_until': str(df['timestamp'].iloc[split - 1])}
+    version = publish(model, MODEL_PATH, metadata)
+    print(f"💾 Model v{version} saved to {MODEL_PATH}")
     return model
 
 def load_demand_model():
@@ -0,0 +1,117 @@
+import numpy as np
+from rl_env import CO2_PER_KWH, CO2_PRICE, grid_price
+
+BATTERY_KWH = 100.0     # usable capacity per site
+BATTERY_RATE = 25.0     # max kWh moved in or out of the battery per hour
+ROUND_TRIP = 0.9        # round-trip efficiency, split evenly between charge and discharge
+SOC_LEVELS = 21         # state-of-charge grid points (5% steps)
+INITIAL_SOC = 0.5       # fraction of capacity at the start of the plan
+CHUNK_SITES = 2048      # sites solved per DP pass; bounds the (sites, levels, levels) temporaries
+
+
+class Battery:
+    """Storage parameters shared by every site of a plan."""
+
+    def __init__(self, capacity=BATTERY_KWH, rate=BATTERY_RATE, efficiency=ROUND_TRIP,
+                 levels=SOC_LEVELS, initial_soc=INITIAL_SOC):
+        if capacity < 0 or rate < 0 or not 0 < efficiency <= 1 or levels < 2 or not 0 <= initial_soc <= 1:
+            raise ValueError("Invalid battery parameters")
+        self.capacity, self.rate, self.efficiency = float(capacity), float(rate), float(efficiency)
+        self.levels, self.initial_soc = int(levels), float(initial_soc)
+
+    def grid(self):
+        """SoC levels (kWh) and, per (from, to) level pair, kWh drawn to charge, kWh delivered
+        by discharging, and whether the move fits the rate limit."""
+        soc = np.linspace(0.0, self.capacity, self.levels)
+        delta = soc[None, :] - soc[:, None]
+        leg = np.sqrt(self.efficiency)
+        charge = np.maximum(delta, 0) / leg
+        discharge = np.maximum(-delta, 0) * leg
+        return soc, charge, discharge, np.abs(delta) <= self.rate + 1e-9
+
+
+def _as_sites(values, name):
+    arr = np.asarray(values, dtype='float64')
+    if arr.ndim == 1:
+        arr = arr[None, :]
+    if arr.ndim != 2 or arr.shape[1] == 0:
+        raise ValueError(f"{name} must be a list of hourly values (or one list per site)")
+    if not np.all(np.isfinite(arr)) or np.any(arr < 0):
+        raise ValueError(f"{name} must be finite and non-negative")
+    return arr
+
+
+def _solve(residual, unit_price, battery):
+    """Backward DP over the SoC grid for a chunk of sites, then a forward pass along the argmins.
+
+    ``residual`` is demand minus solar per (site, hour); returns the
+    (site, hour) arrays of charge drawn, discharge delivered and SoC after each hour.
+    """
+    soc, charge, discharge, allowed = battery.grid()
+    n, hours = residual.shape
+    value = np.zeros((n, battery.levels))
+    policy = np.empty((hours, n, battery.levels), dtype=np.int16)
+    for t in range(hours - 1, -1, -1):
+        r = residual[:, t, None, None]
+        grid = np.maximum(r + charge - discharge, 0.0)
+        cost = grid * unit_price[:, t, None, None] + value[:, None, :]
+        # Discharge only covers the load: exporting or burning stored energy is not a move.
+        cost[~np.broadcast_to(allowed & (discharge <= np.maximum(r, 0) + 1e-9), cost.shape)] = np.inf
+        policy[t] = np.argmin(cost, axis=2)
+        value = np.take_along_axis(cost, policy[t][..., None].astype(np.intp), axis=2)[..., 0]
+
+    level = np.full(n, int(round(battery.initial_soc * (battery.levels - 1))))
+    out = {k: np.empty((n, hours)) for k in ('charge', 'discharge', 'soc')}
+    sites = np.arange(n)
+    for t in range(hours):
+        nxt = policy[t, sites, level].astype(np.intp)
+        out['charge'][:, t] = charge[level, nxt]
+        out['discharge'][:, t] = discharge[level, nxt]
+        out['soc'][:, t] = soc[nxt]
+        level = nxt
+    return out
+
+
+def plan_dispatch(demand, solar, start_hour=0, prices=None, battery=None, chunk_sites=CHUNK_SITES):
+    """Cost-optimal hourly solar/battery/grid split for one or many sites.
+
+    ``demand`` and ``solar`` are hourly kWh, either one list or one row per
+    site. Each hour costs grid kWh times (tariff + CO₂ price); the tariff
+    defaults to the time-of-use ``grid_price`` from ``start_hour`` on, or is
+    given per hour (or per site and hour) as ``prices``. The schedule is the
+    exact optimum over a ``battery.levels``-point SoC grid, found by dynamic
+    programming vectorized across sites and all SoC transitions, so
+    thousands of sites solve in one call (``chunk_sites`` at a time).
+    """
+    demand, solar = _as_sites(demand, "demand"), _as_sites(solar, "solar")
+    if demand.shape != solar.shape:
+        raise ValueError("demand and solar must have the same shape")
+    battery = battery or Battery()
+    n, hours = demand.shape
+    if prices is None:
+        prices = grid_price((start_hour + np.arange(hours)) % 24)
+    prices = np.broadcast_to(np.asarray(prices, dtype='float64'), (n, hours))
+    unit_price = prices + CO2_PER_KWH * CO2_PRICE
+
+    residual = demand - solar
+    parts = [_solve(residual[i:i + chunk_sites], unit_price[i:i + chunk_sites], battery)
+             for i in range(0, n, chunk_sites)]
+    moves = {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+
+    solar_to_load = np.minimum(solar, demand)
+    solar_to_battery = np.minimum(solar - solar_to_load, moves['charge'])
+    grid = np.maximum(residual + moves['charge'] - moves['discharge'], 0.0)
+    baseline_grid = np.maximum(residual, 0.0)  # same solar, no battery
+    return {
+        'hours': ((start_hour + np.arange(hours)) % 24).tolist(),
+        'solar_used': solar_to_load,
+        'solar_to_battery': solar_to_battery,
+        'battery_charge': moves['charge'],
+        'battery_discharge': moves['discharge'],
+        'grid_used': grid,
+        'soc': moves['soc'],
+        'cost': (grid * unit_price).sum(axis=1),
+        'baseline_cost': (baseline_grid * unit_price).sum(axis=1),
+        'co2_kg': grid.sum(axis=1) * CO2_PER_KWH,
+        'co2_saved_kg': (demand - grid).sum(axis=1) * CO2_PER_KWH,  # vs all-grid, as /optimize reports
+    }
@@ -0,0 +1,73 @@
+import os
+import joblib
+import numpy as np
+
+
+class FlatForest:
+    """A fitted RandomForestRegressor flattened into contiguous node arrays.
+
+    All trees are concatenated into single ``feature`` / ``threshold`` /
+    ``left`` / ``right`` / ``value`` arrays and traversed together, one
+    vectorized step per tree level, so scoring a row costs a few NumPy calls
+    instead of sklearn's input validation, thread dispatch and per-tree calls.
+    Leaves point to themselves, so finished paths stay put while deeper trees
+    keep descending. Predictions match ``forest.predict`` within float tolerance.
+    """
+
+    def __init__(self, forest):
+        trees = [est.tree_ for est in forest.estimators_]
+        counts = np.array([t.node_count for t in trees])
+        offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+        feature, threshold, left, right, value = [], [], [], [], []
+        for t, off in zip(trees, offsets):
+            idx = np.arange(t.node_count) + off
+            leaf = t.children_left == -1
+            feature.append(np.where(leaf, 0, t.feature))
+            threshold.append(t.threshold)
+            left.append(np.where(leaf, idx, t.children_left + off))
+            right.append(np.where(leaf, idx, t.children_right + off))
+            value.append(t.value[:, 0, 0])
+
+        self.feature = np.concatenate(feature).astype(np.intp)
+        self.threshold = np.concatenate(threshold).astype(np.float64)
+        self.left = np.concatenate(left).astype(np.intp)
+        self.right = np.concatenate(right).astype(np.intp)
+        self.value = np.concatenate(value).astype(np.float64)
+        self.is_leaf = self.left == np.arange(len(self.left))
+        self.roots = offsets.astype(np.intp)
+        self.max_depth = max(t.max_depth for t in trees)
+        self.n_features_in_ = forest.n_features_in_
+        self.feature_names_in_ = getattr(forest, 'feature_names_in_', None)
+
+    def predict(self, X):
+        # sklearn casts inputs to float32 before comparing against float64 thresholds.
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[1]} features, expected {self.n_features_in_}")
+
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        rows = np.arange(len(X))[:, None]
+        for _ in range(self.max_depth):
+            if self.is_leaf[nodes].all():
+                break
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return self.value[nodes].mean(axis=1)
+
+
+def load_flat(path, mmap_mode=None):
+    """Load a pickled forest as a FlatForest.
+
+    The flattened arrays are cached next to the artifact (``*.flat.pkl``) so
+    that with ``mmap_mode='r'`` every worker process maps the same pages
+    instead of holding its own copy of the trees.
+    """
+    cache = os.path.splitext(path)[0] + ".flat.pkl"
+    if not os.path.exists(cache) or os.path.getmtime(cache) < os.path.getmtime(path):
+        tmp = f"{cache}.{os.getpid()}.tmp"
+        joblib.dump(FlatForest(joblib.load(path)), tmp)
+        os.replace(tmp, cache)
+    return joblib.load(cache, mmap_mode=mmap_mode)
@@ -0,0 +1,245 @@
+import json
+import os
+import threading
+import numpy as np
+import pandas as pd
+from storage import COLUMNS, _file_lock, check_zone
+from telemetry_store import get_zone_store
+
+FEATURES = ['hour', 'temperature', 'solar_energy', 'grid_load', 'consumption_lag1', 'consumption_lag24']
+TARGET = 'consumption'
+ANOMALY_FEATURES = ['consumption']
+DERIVED = ['hour', 'day_of_week', 'consumption_lag1', 'consumption_lag24',
+           'consumption_roll24', 'consumption_roll168']
+ROLLING = {'consumption_roll24': 24, 'consumption_roll168': 168}
+CONTEXT_ROWS = 168  # history a new row's features can look back on
+
+
+def derive(ts, consumption, rows):
+    """Derived features of the rows at indices ``rows`` (ascending) of a time-ordered series.
+
+    ``ts`` are those rows' epoch seconds; ``consumption`` is the history and is
+    only read before each row, except that the first rows, which have no
+    history yet, fall back to the earliest reading (the old ``bfill``). This
+    is the single implementation behind training matrices, the materialized
+    feature store and online lookups.
+    """
+    rows = np.asarray(rows, dtype='int64')
+    out = {
+        'hour': (ts // 3600) % 24,
+        'day_of_week': (ts // 86400 + 3) % 7,  # Monday = 0; the epoch was a Thursday
+        'consumption_lag1': consumption[np.maximum(rows - 1, 0)],
+        'consumption_lag24': consumption[np.maximum(rows - 24, 0)],
+    }
+    if len(rows):
+        ctx = max(int(rows[0]) - CONTEXT_ROWS, 0)
+        sums = np.concatenate([[0.0], np.cumsum(consumption[ctx:rows[-1]], dtype='float64')])
+        for name, window in ROLLING.items():
+            lo = np.maximum(rows - window, 0)
+            count = rows - lo
+            mean = (sums[rows - ctx] - sums[lo - ctx]) / np.maximum(count, 1)
+            out[name] = np.where(count > 0, mean, consumption[0])
+    else:
+        out.update({name: np.empty(0) for name in ROLLING})
+    return {k: np.asarray(v, dtype='float64') for k, v in out.items()}
+
+
+def build_features(df):
+    """Time-ordered copy of ``df`` with all derived features added (batch path of ``derive``)."""
+    df = df.copy()
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df = df.sort_values('timestamp', kind='stable').reset_index(drop=True)
+    ts = df['timestamp'].values.astype('datetime64[s]').astype('int64')
+    for name, values in derive(ts, df['consumption'].to_numpy(dtype='float64'), np.arange(len(df))).items():
+        df[name] = values
+    df['hour'] = df['hour'].astype(int)
+    return df
+
+
+def training_matrix(df):
+    """``(X, y)`` for the demand model from a feature frame (``training_frame`` or ``build_features``)."""
+    return df[FEATURES], df[TARGET]
+
+
+class FeatureFile:
+    """Append-only ``<name>.f64`` files plus ``meta.json`` (rows, last timestamp), like the columnar backend.
+
+    Stored at full precision so reloaded features equal freshly computed ones.
+    """
+
+    def __init__(self, path, names=DERIVED):
+        self.path, self.names = path, names
+
+    def lock(self):
+        """Cross-process lock, so the API and a trainer never interleave writes of the same file."""
+        return _file_lock(self.path + ".lock")
+
+    def _meta_path(self):
+        return os.path.join(self.path, "meta.json")
+
+    def meta(self):
+        try:
+            with open(self._meta_path()) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'rows': 0, 'last_ts': None}
+
+    def read(self, rows):
+        return {n: np.fromfile(os.path.join(self.path, f"{n}.f64"), dtype='<f8', count=rows)
+                for n in self.names}
+
+    def write(self, start, arrays, last_ts):
+        """Write rows from ``start`` on (truncating anything after), then commit the row count."""
+        os.makedirs(self.path, exist_ok=True)
+        k = len(arrays[self.names[0]])
+        for n in self.names:
+            fname = os.path.join(self.path, f"{n}.f64")
+            with open(fname, 'r+b' if os.path.exists(fname) else 'wb') as f:
+                f.truncate(start * 8)
+                f.seek(start * 8)
+                f.write(np.asarray(arrays[n], dtype='<f8').tobytes())
+        tmp = self._meta_path() + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump({'features': self.names, 'rows': start + k, 'last_ts': last_ts}, f)
+        os.replace(tmp, self._meta_path())
+
+
+def features_path(storage):
+    """Where a storage backend's materialized features live: inside a columnar dir, beside a CSV."""
+    return os.path.join(storage.path, "features") if storage.kind == 'columnar' else storage.path + ".features"
+
+
+class FeatureStore:
+    """Derived features materialized once per appended telemetry row.
+
+    Subscribes to a TelemetryStore, computes features only for new rows
+    (with ``CONTEXT_ROWS`` of history) and persists them next to the raw
+    data, so a restart reloads instead of recomputing. ``matrix`` serves
+    training matrices and ``online`` point-in-time lookups; both read the
+    values ``derive`` produced, so training and serving cannot drift apart.
+    """
+
+    def __init__(self, store, path=None, persist=True):
+        self.store = store
+        self.file = FeatureFile(path or features_path(store.storage)) if persist else None
+        self._lock = threading.Lock()
+        self._cols = {n: np.empty(0) for n in DERIVED}
+        self._n = 0
+        self.computed = 0  # rows computed here (not reloaded from disk)
+
+    def attach(self):
+        self.store.subscribe(self._on_append)
+        return self
+
+    def _grow(self, needed):
+        if needed <= len(self._cols[DERIVED[0]]):
+            return
+        capacity = max(needed, 2 * len(self._cols[DERIVED[0]]), 1024)
+        for n, old in self._cols.items():
+            new = np.empty(capacity)
+            new[:self._n] = old[:self._n]
+            self._cols[n] = new
+
+    def _load_persisted(self, ts):
+        """Rows reusable from disk: the file must match the store's timestamps."""
+        if self.file is None:
+            return 0
+        try:
+            with self.file.lock():
+                meta = self.file.meta()
+                rows = meta.get('rows', 0)
+                if not rows or rows > len(ts) or meta.get('last_ts') != int(ts[rows - 1]):
+                    return 0
+                loaded = self.file.read(rows)
+        except OSError:
+            return 0
+        if any(len(v) != rows for v in loaded.values()):
+            return 0
+        self._grow(rows)
+        for n, values in loaded.items():
+            self._cols[n][:rows] = values
+        return rows
+
+    def _on_append(self, start, end, reset):
+        ts = self.store.epochs()
+        consumption = self.store.column('consumption')
+        with self._lock:
+            if reset:
+                self._n = 0
+                start = self._load_persisted(ts[:end])
+                self._n = start
+            if end <= start:
+                return
+            new = derive(ts[start:end], consumption, np.arange(start, end))
+            self._grow(end)
+            for n, values in new.items():
+                self._cols[n][start:end] = values
+            self._n = end
+            self.computed += end - start
+            if self.file is not None:
+                try:
+                    with self.file.lock():
+                        self.file.write(start, new, int(ts[end - 1]))
+                except OSError as e:
+                    print(f"⚠ Could not persist features: {e}")
+
+    def __len__(self):
+        return self._n
+
+    def column(self, name):
+        if name == 'timestamp':
+            return self.store.timestamps()[:self._n]
+        if name in DERIVED:
+            return self._cols[name][:self._n]
+        return self.store.column(name)[:self._n]
+
+    def matrix(self, columns=FEATURES, start=0, end=None):
+        """Feature frame of rows ``[start:end]`` (copies), e.g. ``matrix()[FEATURES]`` for training."""
+        with self._lock:
+            end = self._n if end is None else min(end, self._n)
+            return pd.DataFrame({c: np.array(self.column(c)[start:end]) for c in columns})
+
+    def online(self, at=None):
+        """Point-in-time features of a reading at epoch ``at`` (default: an hour after the latest).
+
+        Only rows strictly before ``at`` are visible. A stored row is answered
+        from the materialized columns (exactly its training features); other
+        instants are derived from the history, which is what serving would
+        have computed back then.
+        """
+        ts = self.store.epochs()
+        n = len(ts) if at is None else int(np.searchsorted(ts, at, side='left'))
+        with self._lock:
+            if at is not None and n < self._n and ts[n] == at:
+                return {name: float(self._cols[name][n]) for name in DERIVED}
+        if n == 0:
+            raise ValueError("No telemetry available")
+        when = int(ts[n - 1]) + 3600 if at is None else int(at)
+        out = derive(np.array([when]), self.store.column('consumption')[:n], np.array([n]))
+        return {k: float(v[0]) for k, v in out.items()}
+
+
+_feature_stores = {}
+_feature_lock = threading.Lock()
+
+
+def get_feature_store(zone_id=None):
+    """Process-wide feature store of one zone, attached to its telemetry store."""
+    zone_id = check_zone(zone_id)
+    store = get_zone_store(zone_id)
+    with _feature_lock:
+        fs = _feature_stores.get(zone_id)
+        if fs is None:
+            fs = _feature_stores[zone_id] = FeatureStore(store).attach()
+    return fs
+
+
+def training_frame(zone_id=None):
+    """Timestamps, raw columns and every derived feature of a zone, read from its feature store.
+
+    Training goes through the same materialized columns that ``online``
+    serves; rows another process already persisted are reloaded, not derived.
+    """
+    frame = get_feature_store(zone_id).matrix(['timestamp', *COLUMNS, *DERIVED])
+    frame['hour'] = frame['hour'].astype(int)
+    return frame
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+from features import FEATURES
+
+EXOG = ['temperature', 'solar_energy', 'grid_load']
+
+
+def hourly_profile(store, column, days=7):
+    """Mean of ``column`` per hour of day over the last ``days`` days of telemetry."""
+    ts = store.epochs()
+    start = int(np.searchsorted(ts, ts[-1] - days * 86400, side='right')) if len(ts) else 0
+    values = store.column(column)[start:]
+    hours = (ts[start:] // 3600) % 24
+    sums = np.bincount(hours, weights=values, minlength=24)
+    counts = np.bincount(hours, minlength=24)
+    overall = values.mean() if len(values) else 0.0
+    return np.where(counts > 0, sums / np.maximum(counts, 1), overall)
+
+
+def recursive_forecast(model, store, horizon=24, exog=None):
+    """Roll the demand model forward ``horizon`` hourly steps.
+
+    Each prediction is fed back as the next step's ``consumption_lag1`` and a
+    24-slot ring buffer supplies ``consumption_lag24``. Temperature, solar and
+    grid load come from ``exog`` (arrays of length ``horizon``) or, by default,
+    from the hour-of-day profile of the last week of telemetry.
+    """
+    last_ts = pd.Timestamp(store.timestamps()[-1])
+    times = pd.date_range(last_ts + pd.Timedelta(hours=1), periods=horizon, freq='h')
+    hours = times.hour.to_numpy()
+
+    exog = dict(exog or {})
+    for col in EXOG:
+        if col not in exog:
+            exog[col] = hourly_profile(store, col)[hours]
+
+    recent = store.tail('consumption', 24)
+    ring = np.full(24, recent[0], dtype='float64')
+    ring[24 - len(recent):] = recent
+    pos = 0  # ring[pos] is the oldest value, i.e. 24 steps before the next target
+
+    X_frame = pd.DataFrame(np.zeros((1, len(FEATURES))), columns=FEATURES)
+    preds = np.empty(horizon)
+    for t in range(horizon):
+        X_frame.iloc[0] = [hours[t], exog['temperature'][t], exog['solar_energy'][t],
+                           exog['grid_load'][t], ring[pos - 1], ring[pos]]
+        preds[t] = model.predict(X_frame)[0]  # all trees scored in one call
+        ring[pos] = preds[t]
+        pos = (pos + 1) % 24
+
+    return pd.DataFrame({
+        'timestamp': times,
+        'predicted_consumption': preds,
+        **{col: np.asarray(exog[col], dtype='float64') for col in EXOG}
+    })
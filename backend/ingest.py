@@ -0,0 +1,212 @@
+import threading
+import time
+import numpy as np
+import pandas as pd
+from storage import COLUMNS, check_zone, get_storage, to_epoch
+from telemetry_store import get_zone_store
+
+BATCH_ROWS = 1000  # flush once this many rows are buffered
+FLUSH_INTERVAL = 1.0  # ... or when the oldest buffered row is this old (seconds)
+MAX_BUFFER_ROWS = 100000  # back-pressure: submissions beyond this are rejected
+
+
+def validate(records):
+    """Vectorized check of a list of row dicts.
+
+    Returns ``(df, rejected)``: the valid rows (timestamp + float columns,
+    sorted by time) and a list of ``{"row": i, "error": ...}`` for the rest,
+    including records that are not JSON objects at all.
+    """
+    is_row = np.fromiter((isinstance(r, dict) for r in records), dtype=bool, count=len(records))
+    rows = np.flatnonzero(is_row)  # position in ``records`` of each frame row
+    rejected = [{"row": int(i), "error": "Not a JSON object"} for i in np.flatnonzero(~is_row)]
+    df = pd.DataFrame.from_records([records[i] for i in rows]) if len(rows) else pd.DataFrame()
+    missing = [c for c in ['timestamp'] + COLUMNS if c not in df.columns]
+    if missing:
+        return df.iloc[:0], rejected + [{"row": int(i), "error": f"Missing fields: {missing}"} for i in rows]
+
+    out = pd.DataFrame({'timestamp': pd.to_datetime(df['timestamp'], errors='coerce', format='mixed')})
+    for c in COLUMNS:
+        out[c] = pd.to_numeric(df[c], errors='coerce')
+    bad_ts = out['timestamp'].isna().to_numpy()
+    bad_num = ~np.isfinite(out[COLUMNS].to_numpy(dtype='float64')).all(axis=1)
+    rejected += [{"row": int(rows[i]), "error": "Invalid timestamp" if bad_ts[i] else "Non-numeric or missing reading"}
+                 for i in np.flatnonzero(bad_ts | bad_num)]
+    return out[~(bad_ts | bad_num)].sort_values('timestamp', kind='stable'), rejected
+
+
+class Ingestor:
+    """Buffers validated readings and appends them to storage in batches.
+
+    Each flush is one durable append (``storage.append(..., sync=True)``):
+    data is fsynced before the commit marker moves, so a reader – the
+    telemetry store or another process – sees either the whole batch or none
+    of it. Rows at or before the last stored timestamp are rejected, keeping
+    the store time-ordered for the rollups and windowed aggregates and making
+    a retried batch idempotent; a failed append puts its rows back in the
+    buffer for the next flush. Flushes hold the storage's cross-process lock,
+    so several writers (the API and the simulator) can share a partition;
+    rows another writer has already overtaken are dropped at flush time.
+    """
+
+    def __init__(self, storage=None, batch_rows=BATCH_ROWS, flush_interval=FLUSH_INTERVAL,
+                 max_buffer_rows=MAX_BUFFER_ROWS, last_timestamp=None, on_flush=None):
+        self.storage = storage or get_storage()
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval
+        self.max_buffer_rows = max_buffer_rows
+        self.last_timestamp = last_timestamp  # epoch seconds of the newest stored row
+        self.on_flush = on_flush  # called after each durable append, e.g. to refresh the telemetry store
+        self._buffer = []
+        self._buffered = 0
+        self._oldest = None
+        self._lock = threading.Lock()  # guards the buffer
+        self._flush_lock = threading.Lock()  # serializes appends to storage
+        self._stop = threading.Event()
+        self._thread = None
+        self.accepted = 0
+        self.rejected = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.flush_seconds = 0.0
+
+    def submit(self, records):
+        """Validate and buffer ``records``; returns ``{"accepted", "rejected", "errors"}``."""
+        df, errors = validate(records)
+        with self._lock:
+            if self.last_timestamp is not None and len(df):
+                stale = to_epoch(df['timestamp']) <= self.last_timestamp
+                if stale.any():
+                    errors += [{"row": None, "error": f"{int(stale.sum())} rows not newer than the last stored reading"}]
+                    df = df[~stale]
+            if self._buffered + len(df) > self.max_buffer_rows:
+                errors += [{"row": None, "error": f"Ingest buffer full; {len(df)} rows dropped"}]
+                df = df.iloc[:0]
+            if len(df):
+                self._buffer.append(df)
+                self._buffered += len(df)
+                self._oldest = self._oldest or time.monotonic()
+            self.accepted += len(df)
+            self.rejected += len(records) - len(df)
+            full = self._buffered >= self.batch_rows
+        if full:
+            try:
+                self.flush()
+            except OSError as e:  # the rows stay buffered; the flusher thread retries
+                print(f"⚠ Ingest flush failed: {e}")
+        return {"accepted": len(df), "rejected": len(records) - len(df), "errors": errors[:20]}
+
+    def flush(self):
+        """Append everything buffered as one durable batch; returns the number of rows written."""
+        with self._flush_lock:
+            with self._lock:
+                batches, self._buffer = self._buffer, []
+                self._buffered, self._oldest = 0, None
+            if not batches:
+                return 0
+            # Batches may interleave (a retry re-sends rows still buffered): order them and keep one row per timestamp.
+            df = pd.concat(batches, ignore_index=True).sort_values('timestamp', kind='stable')
+            unique = df.drop_duplicates('timestamp', keep='last')
+            self._reclassify(len(df) - len(unique))
+            start = time.perf_counter()
+            try:
+                with self.storage.lock():
+                    df = self._drop_overtaken(unique, self.storage.last_epoch())
+                    if len(df):
+                        self.storage.append(df, sync=True)
+            except BaseException:
+                with self._lock:
+                    self._buffer[:0] = [unique]
+                    self._buffered += len(unique)
+                    self._oldest = self._oldest or time.monotonic()
+                raise
+            if len(df):
+                with self._lock:
+                    last = int(to_epoch(df['timestamp'].iloc[-1:])[0])
+                    self.last_timestamp = max(self.last_timestamp or last, last)
+            self.flush_seconds += time.perf_counter() - start
+            self.flushes += 1
+            self.flushed += len(df)
+        if self.on_flush is not None:
+            self.on_flush()
+        return len(df)
+
+    def _reclassify(self, n):
+        """Count ``n`` accepted rows that were dropped at flush time as rejected."""
+        if n:
+            with self._lock:
+                self.accepted -= n
+                self.rejected += n
+
+    def _drop_overtaken(self, df, last):
+        """Drop rows not newer than ``last`` (the stored tail, possibly written by another process)."""
+        if last is None:
+            return df
+        stale = to_epoch(df['timestamp']) <= last
+        with self._lock:
+            self.last_timestamp = max(self.last_timestamp or last, last)
+        self._reclassify(int(stale.sum()))
+        if stale.any():
+            print(f"⚠ Dropped {int(stale.sum())} rows not newer than the stored data (another writer got ahead)")
+        return df[~stale]
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval / 4):
+            if self._oldest and time.monotonic() - self._oldest >= self.flush_interval:
+                try:
+                    self.flush()
+                except OSError as e:
+                    print(f"⚠ Ingest flush failed: {e}")
+
+    def start(self):
+        """Start the background thread that flushes on ``flush_interval``."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="ecowatt-ingest", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the flusher and write whatever is still buffered."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def stats(self):
+        return {"accepted": self.accepted, "rejected": self.rejected, "buffered": self._buffered,
+                "flushed": self.flushed, "flushes": self.flushes,
+                "avg_flush_ms": round(self.flush_seconds / self.flushes * 1e3, 3) if self.flushes else None}
+
+
+_ingestors = {}
+_ingestor_lock = threading.Lock()
+
+
+def get_ingestor(zone_id=None, create=False):
+    """Process-wide ingestor for one zone, writing to that zone's storage partition.
+
+    ``create=True`` allows a zone without data yet; see ``get_zone_store``.
+    """
+    zone_id = check_zone(zone_id)
+    with _ingestor_lock:
+        ingestor = _ingestors.get(zone_id)
+        if ingestor is None:
+            store = get_zone_store(zone_id, create=create)
+            last = int(store.epochs()[-1]) if len(store) else None
+            # Refreshing on flush pushes new rows to the store's listeners (e.g. anomaly detection) right away.
+            ingestor = _ingestors[zone_id] = Ingestor(store.storage, last_timestamp=last, on_flush=store.refresh).start()
+    return ingestor
+
+
+def flush_all():
+    """Flush every zone's buffered rows; returns the number of rows written."""
+    with _ingestor_lock:
+        ingestors = list(_ingestors.values())
+    return sum(ingestor.flush() for ingestor in ingestors)
+
+
+def ingest_stats():
+    """Counters of every zone's ingestor."""
+    with _ingestor_lock:
+        return {zone: ingestor.stats() for zone, ingestor in _ingestors.items()}
@@ -0,0 +1,309 @@
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter as Tally, deque
+from contextlib import contextmanager
+
+SUB_BUCKET_BITS = 6        # 64 linear sub-buckets per power of two: values recorded within ~3%
+MAX_MICROS = 600_000_000   # 10 minutes; longer observations land in the top bucket
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+PROFILE_INTERVAL = float(os.environ.get("ECOWATT_PROFILE_INTERVAL", 0.005))  # seconds between samples
+SLOW_REQUEST_SECONDS = float(os.environ.get("ECOWATT_SLOW_REQUEST", 0.5))
+PROFILE_SAMPLES = 20000    # stack samples kept for slow-request lookups
+PROFILE_ON_START = os.environ.get("ECOWATT_PROFILE") == "1"
+IDLE_LEAVES = {"threading.py:wait", "selectors.py:select", "queue.py:get", "thread.py:_worker"}  # parked threads
+
+
+def log_linear_index(n):
+    """Bucket of a non-negative integer: exact below 2**SUB_BUCKET_BITS, then
+    2**(SUB_BUCKET_BITS-1) equal buckets per power of two."""
+    sub = 1 << SUB_BUCKET_BITS
+    if n < sub:
+        return n
+    half = sub >> 1
+    shift = n.bit_length() - SUB_BUCKET_BITS
+    return sub + (shift - 1) * half + (n >> shift) - half
+
+
+def log_linear_upper(idx):
+    """Upper edge (exclusive) of bucket ``idx`` of ``log_linear_index``."""
+    sub = 1 << SUB_BUCKET_BITS
+    if idx < sub:
+        return idx + 1
+    half = sub >> 1
+    shift = (idx - sub) // half + 1
+    return ((idx - sub) % half + half + 1) << shift
+
+
+class HdrHistogram:
+    """Log-linear latency histogram in microseconds, HDR style.
+
+    Values below 2**SUB_BUCKET_BITS are exact; above, each power of two is
+    split into 2**(SUB_BUCKET_BITS-1) equal buckets, so quantiles are within
+    a few percent at any scale while recording is an O(1) list increment.
+    """
+
+    def __init__(self):
+        self.counts = [0] * (log_linear_index(MAX_MICROS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        micros = min(max(int(seconds * 1e6), 0), MAX_MICROS)
+        with self._lock:
+            self.counts[log_linear_index(micros)] += 1
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """Upper edge of the bucket holding the ``q`` quantile, in seconds."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank, seen = q * self.count, 0
+            for idx, c in enumerate(self.counts):
+                seen += c
+                if c and seen >= rank:
+                    return min(log_linear_upper(idx) / 1e6, self.max)
+            return self.max
+
+
+class Metric:
+    """One metric family; children are keyed by their label values."""
+
+    kind = None
+
+    def __init__(self, name, help=""):
+        self.name, self.help = name, help
+        self._children = {}
+        self._fn = None
+        self._lock = threading.Lock()
+
+    def set_function(self, fn):
+        """Compute the value at scrape time: ``fn()`` returns a number or ``[(labels, value), ...]``."""
+        self._fn = fn
+        return self
+
+    def samples(self):
+        if self._fn is not None:
+            value = self._fn()
+            return list(value) if isinstance(value, (list, tuple)) else [({}, value)]
+        with self._lock:
+            return [(dict(k), v) for k, v in self._children.items()]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._children[key] = self._children.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._children[tuple(sorted(labels.items()))] = value
+
+
+class Histogram(Metric):
+    """Latency family exported as a Prometheus summary (quantiles, sum, count)."""
+
+    kind = "summary"
+
+    def child(self, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            hist = self._children.get(key)
+            if hist is None:
+                hist = self._children[key] = HdrHistogram()
+        return hist
+
+    def observe(self, seconds, **labels):
+        self.child(**labels).record(seconds)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+        return metric
+
+    def counter(self, name, help=""):
+        return self._get(Counter, name, help)
+
+    def gauge(self, name, help=""):
+        return self._get(Gauge, name, help)
+
+    def histogram(self, name, help=""):
+        return self._get(Histogram, name, help)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (0.0.4)."""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for m in metrics:
+            try:
+                samples = m.samples()
+            except Exception as e:  # a broken collector must not take down the scrape
+                print(f"⚠ Metric {m.name} failed: {e}")
+                continue
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            for labels, value in samples:
+                if isinstance(value, HdrHistogram):
+                    for q in QUANTILES:
+                        lines.append(f"{m.name}{_labels(labels, quantile=q)} {value.quantile(q):.6g}")
+                    lines.append(f"{m.name}_sum{_labels(labels)} {value.total:.6g}")
+                    lines.append(f"{m.name}_count{_labels(labels)} {value.count}")
+                else:
+                    lines.append(f"{m.name}{_labels(labels)} {float(value):.17g}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels, **extra):
+    items = {**labels, **extra}
+    if not items:
+        return ""
+    def esc(v):
+        return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in items.items()) + "}"
+
+
+REGISTRY = MetricsRegistry()
+STAGE_SECONDS = REGISTRY.histogram("ecowatt_stage_seconds", "Wall time of instrumented hot-path stages")
+ROWS_SCANNED = REGISTRY.counter("ecowatt_rows_scanned_total", "Telemetry rows read or scored, by stage")
+MODEL_LOADS = REGISTRY.counter("ecowatt_model_loads_total", "Model artifacts loaded from disk")
+
+
+def stage(name):
+    """``with stage("demand_predict"):`` records the block's wall time under ``stage=name``."""
+    return STAGE_SECONDS.time(stage=name)
+
+
+def timed(name):
+    """Decorator form of ``stage``."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# ---------- SAMPLING PROFILER ----------
+class SamplingProfiler:
+    """Opt-in wall-clock profiler that samples every thread's stack each ``interval``.
+
+    Samples are timestamped folded stacks (``file:func;file:func``) in a
+    bounded ring. When a request ends slower than ``slow_seconds``, the
+    samples taken during it are merged into that route's profile, which
+    ``folded`` returns in the format flamegraph.pl and speedscope read.
+    Samples are not tied to the request's thread (handlers hop between the
+    event loop and the executor), so concurrent work shows up too. Costs
+    nothing while disabled.
+    """
+
+    def __init__(self, interval=PROFILE_INTERVAL, slow_seconds=SLOW_REQUEST_SECONDS, maxlen=PROFILE_SAMPLES):
+        self.interval, self.slow_seconds = interval, slow_seconds
+        self._samples = deque(maxlen=maxlen)
+        self._profiles = {}
+        self._slow = Tally()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def enabled(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.enabled:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ecowatt-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        self._thread = None
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            for ident, frame in sys._current_frames().items():
+                if ident != me and _leaf(frame) not in IDLE_LEAVES:
+                    self._samples.append((now, _fold(frame)))
+
+    def request_done(self, route, start, end):
+        """Attach the samples of a slow request to ``route``'s profile."""
+        if not self.enabled or end - start < self.slow_seconds:
+            return
+        stacks = Tally(s for t, s in list(self._samples) if start <= t <= end)
+        with self._lock:
+            self._profiles.setdefault(route, Tally()).update(stacks)
+            self._slow[route] += 1
+
+    def folded(self, route=None):
+        """Folded stacks (``stack count`` per line) of one route or all slow requests."""
+        with self._lock:
+            merged = Tally()
+            for r, stacks in self._profiles.items():
+                if route is None or r == route:
+                    merged.update(stacks)
+        return "\n".join(f"{stack} {n}" for stack, n in merged.most_common()) + "\n"
+
+    def info(self):
+        with self._lock:
+            return {"enabled": self.enabled, "interval_seconds": self.interval,
+                    "slow_request_seconds": self.slow_seconds, "samples_buffered": len(self._samples),
+                    "slow_requests": dict(self._slow)}
+
+    def reset(self):
+        with self._lock:
+            self._profiles.clear()
+            self._slow.clear()
+
+
+def _leaf(frame):
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}"
+
+
+def _fold(frame):
+    names = []
+    while frame is not None:
+        names.append(_leaf(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+profiler = SamplingProfiler()
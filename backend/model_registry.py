@@ -0,0 +1,289 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+import joblib
+import numpy as np
+import pandas as pd
+from metrics import MODEL_LOADS, stage
+
+BASE_DIR = os.path.dirname(__file__)
+MODELS_DIR = os.path.join(BASE_DIR, "models")
+DEMAND_PATH = os.path.join(BASE_DIR, "demand_model.pkl")
+ANOMALY_PATH = os.path.join(BASE_DIR, "anomaly_model.pkl")
+ZONE_MODELS_DIR = os.path.join(MODELS_DIR, "zones")
+ZONE_MODEL_CACHE = int(os.environ.get("ECOWATT_ZONE_MODELS", 8))  # per-zone models kept in memory
+
+
+def _signature(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _meta_path(path):
+    return os.path.splitext(path)[0] + ".meta.json"
+
+
+def read_metadata(path):
+    """Metadata published with the active artifact at ``path`` ({} if none)."""
+    try:
+        with open(_meta_path(path)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def warm_up(model):
+    """Run one prediction so lazy allocations happen before the model serves traffic."""
+    n = getattr(model, 'n_features_in_', 1)
+    names = getattr(model, 'feature_names_in_', None)
+    X = pd.DataFrame(np.zeros((1, n)), columns=names) if names is not None else np.zeros((1, n))
+    model.predict(X)
+
+
+class ModelEntry:
+    def __init__(self, name, path, loader, warmup):
+        self.name = name
+        self.path = path
+        self.loader = loader
+        self.warmup = warmup
+        self.model = None
+        self.signature = None
+        self.version = 0  # bumped on every successful (re)load
+        self.metadata = {}
+        self.loaded_at = None
+        self.checked_at = 0.0
+
+
+class ModelRegistry:
+    """Named models that are hot-reloaded when their artifact changes on disk.
+
+    ``get`` always returns the currently active model. A new artifact is
+    loaded and warmed up on the side, then swapped in under a lock, so a
+    request never sees a half-loaded model. Changes are picked up either by
+    ``start_watcher`` (a polling thread) or, without a watcher, by a
+    throttled mtime check inside ``get``.
+    """
+
+    def __init__(self, poll_interval=2.0, mmap_mode=None):
+        self.poll_interval = poll_interval
+        self.mmap_mode = mmap_mode
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+        self.reloads = 0
+
+    def register(self, name, path, loader=None, warmup=warm_up):
+        """Register (or reconfigure) a model; ``loader(path)`` defaults to ``joblib.load``."""
+        loader = loader or (lambda p: joblib.load(p, mmap_mode=self.mmap_mode))
+        with self._lock:
+            self._entries[name] = ModelEntry(name, path, loader, warmup)
+
+    def _load(self, entry):
+        signature = _signature(entry.path)
+        if signature is None or signature == entry.signature:
+            return False
+        with stage("model_load"):
+            model = entry.loader(entry.path)
+            if entry.warmup is not None:
+                entry.warmup(model)
+        MODEL_LOADS.inc(model=entry.name)
+        metadata = {}
+        if os.path.exists(_meta_path(entry.path)):
+            with open(_meta_path(entry.path)) as f:
+                metadata = json.load(f)
+        with self._lock:
+            entry.model, entry.signature, entry.metadata = model, signature, metadata
+            entry.version += 1
+            entry.loaded_at = datetime.now().isoformat(timespec='seconds')
+            self.reloads += 1
+        print(f"🔁 Loaded model '{entry.name}' v{entry.version} from {entry.path}")
+        return True
+
+    def refresh(self, name=None):
+        """Reload any registered model whose artifact changed; returns the names reloaded."""
+        names = [name] if name else list(self._entries)
+        reloaded = []
+        for n in names:
+            entry = self._entries[n]
+            entry.checked_at = time.monotonic()
+            try:
+                if self._load(entry):
+                    reloaded.append(n)
+            except Exception as e:  # keep serving the previous model
+                print(f"⚠ Failed to reload model '{n}': {e}")
+        return reloaded
+
+    def get(self, name):
+        """Active model for ``name`` or None if no artifact exists yet."""
+        entry = self._entries[name]
+        if entry.model is None:
+            self.refresh(name)
+        elif self._watcher is None and time.monotonic() - entry.checked_at >= self.poll_interval:
+            self.refresh(name)
+        return entry.model
+
+    def get_versioned(self, name):
+        """``(model, version)`` read consistently under the registry lock."""
+        self.get(name)
+        with self._lock:
+            entry = self._entries[name]
+            return entry.model, entry.version
+
+    def info(self):
+        return {n: {'path': e.path, 'version': e.version, 'loaded_at': e.loaded_at, 'metadata': e.metadata}
+                for n, e in self._entries.items()}
+
+    def start_watcher(self):
+        """Poll registered artifacts in a daemon thread every ``poll_interval`` seconds."""
+        if self._watcher is not None:
+            return
+
+        def watch():
+            while not self._stop.wait(self.poll_interval):
+                self.refresh()
+
+        self._watcher = threading.Thread(target=watch, daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        if self._watcher is not None:
+            self._stop.set()
+            self._watcher.join()
+            self._watcher = None
+            self._stop.clear()
+
+
+def zone_model_path(zone_id, name):
+    """Active artifact of a zone's ``name`` model (``demand`` / ``anomaly``)."""
+    return os.path.join(ZONE_MODELS_DIR, zone_id, f"{name}_model.pkl")
+
+
+class ZoneModels:
+    """Per-zone models behind an LRU of at most ``capacity`` loaded artifacts.
+
+    A zone without its own artifact shares the global model from ``registry``
+    (which is also what the default zone uses). A zone artifact is reloaded
+    when its file changes; the least recently used one is dropped once more
+    than ``capacity`` are loaded, which bounds memory with many zones.
+    """
+
+    def __init__(self, registry, capacity=ZONE_MODEL_CACHE):
+        self.registry = registry
+        self.capacity = capacity
+        self._cache = OrderedDict()  # (zone, name) -> (model, signature)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def get(self, zone_id, name):
+        if zone_id is None or zone_id == "default":
+            return self.registry.get(name)
+        path = zone_model_path(zone_id, name)
+        signature = _signature(path)
+        if signature is None:
+            return self.registry.get(name)
+        key = (zone_id, name)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[1] == signature:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached[0]
+        with stage("model_load"):
+            model = joblib.load(path, mmap_mode=self.registry.mmap_mode)
+            warm_up(model)
+        MODEL_LOADS.inc(model=name, zone=zone_id)
+        with self._lock:
+            self._cache[key] = (model, signature)
+            self._cache.move_to_end(key)
+            self.loads += 1
+            while len(self._cache) > self.capacity:
+                self._cache.popitem(last=False)
+                self.evictions += 1
+        return model
+
+    def get_versioned(self, zone_id, name):
+        """``(model, version)`` of a zone; the version is the artifact's mtime, or the global model's version."""
+        path = zone_model_path(zone_id, name) if zone_id not in (None, "default") else None
+        signature = _signature(path) if path else None
+        if signature is None:
+            return self.registry.get_versioned(name)
+        return self.get(zone_id, name), signature[0]
+
+    def info(self):
+        with self._lock:
+            loaded = [f"{zone}/{name}" for zone, name in self._cache]
+        return {"capacity": self.capacity, "loaded": loaded, "hits": self.hits,
+                "loads": self.loads, "evictions": self.evictions}
+
+
+def publish(model, path, metadata=None):
+    """Store a versioned artifact and atomically activate it at ``path``.
+
+    Versions go to ``models/<name>/``, or next to the artifact for paths
+    already under ``models/`` (zone models). The active file is replaced with
+    ``os.replace``, so a registry polling ``path`` sees either the previous
+    artifact or the new one, never a partial write.
+    """
+    if os.path.abspath(path).startswith(os.path.abspath(MODELS_DIR) + os.sep):
+        version_dir = os.path.splitext(path)[0]
+    else:
+        version_dir = os.path.join(MODELS_DIR, os.path.splitext(os.path.basename(path))[0])
+    os.makedirs(version_dir, exist_ok=True)
+    version = 1 + max([int(f[1:5]) for f in os.listdir(version_dir) if f.endswith(".pkl")] or [0])
+    metadata = dict(metadata or {}, version=version, published_at=datetime.now().isoformat(timespec='seconds'))
+
+    artifact = os.path.join(version_dir, f"v{version:04d}.pkl")
+    joblib.dump(model, artifact)
+    with open(os.path.join(version_dir, f"v{version:04d}.json"), 'w') as f:
+        json.dump(metadata, f, indent=2, default=str)
+
+    tmp = path + ".tmp"
+    joblib.dump(model, tmp)
+    with open(_meta_path(path) + ".tmp", 'w') as f:
+        json.dump(metadata, f, indent=2, default=str)
+    os.replace(_meta_path(path) + ".tmp", _meta_path(path))
+    os.replace(tmp, path)
+    return version
+
+
+def data_range(df):
+    """Training-data summary stored with each artifact."""
+    ts = pd.to_datetime(df['timestamp'])
+    return {'rows': int(len(df)), 'start': str(ts.min()), 'end': str(ts.max())}
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Process-wide registry with the demand and anomaly models registered."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry(mmap_mode=os.environ.get("ECOWATT_MODEL_MMAP") or None)
+            _registry.register("demand", DEMAND_PATH)
+            _registry.register("anomaly", ANOMALY_PATH)
+    return _registry
+
+
+_zone_models = None
+
+
+def get_zone_models():
+    """Process-wide per-zone model LRU backed by the global registry."""
+    global _zone_models
+    registry = get_registry()
+    with _registry_lock:
+        if _zone_models is None:
+            _zone_models = ZoneModels(registry)
+    return _zone_models
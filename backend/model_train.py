@@ -1,44 +1,188 @@
 import pandas as pd
 import joblib
+import numpy as np
 from sklearn.ensemble import RandomForestRegressor, IsolationForest
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import TimeSeriesSplit
 from sklearn.metrics import mean_squared_error
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+import argparse
 import os
+import time
+from energy_data import ensure_data
+from features import ANOMALY_FEATURES, FEATURES, training_frame, training_matrix
+from model_registry import data_range, publish, read_metadata, zone_model_path
+from storage import DEFAULT_ZONE, check_zone, list_zones
 
 BASE_DIR = os.path.dirname(__file__)
-CSV_PATH = os.path.join(BASE_DIR, "energy_data.csv")
 MODEL_PATH = os.path.join(BASE_DIR, "demand_model.pkl")
 ANOMALY_PATH = os.path.join(BASE_DIR, "anomaly_model.pkl")
 
-def train_models():
-    df = pd.read_csv(CSV_PATH)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    df = df.sort_values('timestamp')
+DEMAND_PARAMS = {'n_estimators': 100, 'random_state': 42}
+ANOMALY_PARAMS = {'contamination': 0.02, 'random_state': 42}
+CV_SPLITS = 5
+INCREMENTAL_TREES = 20  # trees added per incremental update
+MIN_INCREMENTAL_ROWS = 24  # fewer new rows than this: keep the current model
 
-    df['hour'] = df['timestamp'].dt.hour
-    df['consumption_lag1'] = df['consumption'].shift(1).fillna(method='bfill')
-    df['consumption_lag24'] = df['consumption'].shift(24).fillna(method='bfill')
+# ---------- FITTING (top-level so they run in worker processes) ----------
+def _for_serving(model):
+    """Drop the training ``n_jobs`` so single-row predictions don't spin up a joblib pool."""
+    return model.set_params(n_jobs=None)
 
-    features = ['hour', 'temperature', 'solar_energy', 'grid_load', 'consumption_lag1', 'consumption_lag24']
-    X = df[features]
-    y = df['consumption']
+def fit_demand(X, y, n_jobs=-1, params=DEMAND_PARAMS):
+    model = RandomForestRegressor(n_jobs=n_jobs, **params)
+    model.fit(X, y)
+    return _for_serving(model)
 
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)
-    model = RandomForestRegressor(n_estimators=100, random_state=42)
-    model.fit(X_train, y_train)
+def fit_anomaly(X, n_jobs=-1, params=ANOMALY_PARAMS):
+    model = IsolationForest(n_jobs=n_jobs, **params)
+    model.fit(X)
+    return _for_serving(model)
 
-    preds = model.predict(X_test)
-    mse = mean_squared_error(y_test, preds)
-    print(f"✅ Demand Model Trained | Test MSE: {mse:.3f}")
-    joblib.dump(model, MODEL_PATH)
-    print(f"💾 Saved model: {MODEL_PATH}")
+def _fold_mse(X, y, train_idx, test_idx, params):
+    model = fit_demand(X.iloc[train_idx], y.iloc[train_idx], n_jobs=1, params=params)
+    return float(mean_squared_error(y.iloc[test_idx], model.predict(X.iloc[test_idx])))
 
-    # Train anomaly model
-    anom = IsolationForest(contamination=0.02, random_state=42)
-    anom.fit(df[['consumption']])
-    joblib.dump(anom, ANOMALY_PATH)
-    print(f"💾 Saved anomaly model: {ANOMALY_PATH}")
+def cross_validate(X, y, n_splits=CV_SPLITS, pool=None, params=DEMAND_PARAMS):
+    """Test MSE of each ``TimeSeriesSplit`` fold, folds fitted in parallel on ``pool`` if given."""
+    folds = list(TimeSeriesSplit(n_splits=n_splits).split(X))
+    if pool is None:
+        return [_fold_mse(X, y, tr, te, params) for tr, te in folds]
+    return list(pool.map(_fold_mse, *zip(*[(X, y, tr, te, params) for tr, te in folds])))
 
-if __name__ == "__main__":
-    train_models()
+# ---------- RUNNER ----------
+class StageTimer:
+    """Wall-clock seconds per named training stage."""
+
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def __call__(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round(time.perf_counter() - start, 3)
+
+    def report(self, prefix=""):
+        total = sum(self.timings.values())
+        parts = " | ".join(f"{k} {v:.2f}s" for k, v in self.timings.items())
+        print(f"⏱ {prefix}{parts} | total {total:.2f}s")
+
+def _paths(zone):
+    if zone == DEFAULT_ZONE:
+        return MODEL_PATH, ANOMALY_PATH
+    model_path, anomaly_path = zone_model_path(zone, "demand"), zone_model_path(zone, "anomaly")
+    os.makedirs(os.path.dirname(model_path), exist_ok=True)
+    return model_path, anomaly_path
+
+def train_models(zone=None, n_jobs=-1, cv_splits=CV_SPLITS, incremental=False, parallel=True):
+    """Train the demand and anomaly models on one zone; non-default zones get their own artifacts.
+
+    A full run cross-validates the demand forest over ``TimeSeriesSplit``
+    folds, then fits it on the first 80% (scored on the last 20%, as before)
+    while the anomaly model fits concurrently. ``incremental=True`` instead
+    grows the active forest by ``INCREMENTAL_TREES`` trees fitted on the rows
+    appended since it was trained (``warm_start``); it falls back to a full
+    run when there is no usable model. The anomaly model is always refit on
+    all rows, which is cheap. Returns the per-stage timings.
+    """
+    zone = check_zone(zone)
+    model_path, anomaly_path = _paths(zone)
+    stage = StageTimer()
+    workers = max(1, os.cpu_count() or 1) if parallel else 0
+    pool = ProcessPoolExecutor(max_workers=max(2, workers)) if parallel else None
+    try:
+        with stage("load"):
+            ensure_data(zone)
+        with stage("features"):
+            df = training_frame(zone)
+            X, y = training_matrix(df)
 
+        if incremental:
+            result = _update_demand(df, X, y, model_path, n_jobs, stage)
+            if result is not None:
+                model, metadata = result
+                anom = None
+                if metadata['mode'] != 'unchanged':
+                    with stage("anomaly"):
+                        anom = fit_anomaly(df[ANOMALY_FEATURES], n_jobs)
+                return _publish(zone, df, model, metadata, anom, model_path, anomaly_path, stage)
+
+        split = int(len(df) * 0.8)
+        with stage("cv"):
+            fold_mse = cross_validate(X, y, cv_splits, pool) if len(df) > cv_splits + 1 else []
+        with stage("fit"):
+            if pool is not None:
+                demand_job = pool.submit(fit_demand, X.iloc[:split], y.iloc[:split], n_jobs)
+                anomaly_job = pool.submit(fit_anomaly, df[ANOMALY_FEATURES], n_jobs)
+                model, anom = demand_job.result(), anomaly_job.result()
+            else:
+                model = fit_demand(X.iloc[:split], y.iloc[:split], n_jobs)
+                anom = fit_anomaly(df[ANOMALY_FEATURES], n_jobs)
+        with stage("evaluate"):
+            mse = mean_squared_error(y.iloc[split:], model.predict(X.iloc[split:]))
+        print(f"✅ Demand Model Trained [{zone}] | Test MSE: {mse:.3f}"
+              + (f" | CV MSE {np.mean(fold_mse):.3f} ± {np.std(fold_mse):.3f}" if fold_mse else ""))
+        metadata = {'mode': 'full', 'test_mse': float(mse), 'cv_mse': fold_mse,
+                    'trained_until': str(df['timestamp'].iloc[split - 1])}
+        return _publish(zone, df, model, metadata, anom, model_path, anomaly_path, stage)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+def _update_demand(df, X, y, model_path, n_jobs, stage):
+    """Warm-start the active forest on rows after its ``trained_until``; None means do a full run."""
+    metadata = read_metadata(model_path)
+    trained_until = metadata.get('trained_until') or metadata.get('data', {}).get('end')
+    if not os.path.exists(model_path) or trained_until is None:
+        print("⚠ No trained model to update, running a full training")
+        return None
+    with stage("load_model"):
+        model = joblib.load(model_path)
+    if not isinstance(model, RandomForestRegressor):
+        print("⚠ Active demand model cannot be warm-started, running a full training")
+        return None
+
+    new = (df['timestamp'] > pd.Timestamp(trained_until)).to_numpy()
+    if new.sum() < MIN_INCREMENTAL_ROWS:
+        print(f"✅ Only {int(new.sum())} new rows since {trained_until}; keeping the current model")
+        return model, {'mode': 'unchanged'}
+    with stage("evaluate"):
+        # The current model has not seen these rows: an honest out-of-sample score.
+        mse = mean_squared_error(y[new], model.predict(X[new]))
+    with stage("fit"):
+        model.set_params(warm_start=True, n_jobs=n_jobs, n_estimators=len(model.estimators_) + INCREMENTAL_TREES)
+        model.fit(X[new], y[new])
+        _for_serving(model)
+    print(f"✅ Demand Model Updated | +{INCREMENTAL_TREES} trees on {int(new.sum())} new rows "
+          f"({len(model.estimators_)} total) | MSE on new rows before update: {mse:.3f}")
+    return model, {'mode': 'incremental', 'test_mse': float(mse), 'new_rows': int(new.sum()),
+                   'trained_until': str(df['timestamp'].iloc[-1])}
+
+def _publish(zone, df, model, metadata, anom, model_path, anomaly_path, stage):
+    if metadata.get('mode') == 'unchanged':
+        stage.report(f"[{zone}] ")
+        return stage.timings
+    with stage("publish"):
+        metadata.update(zone_id=zone, features=FEATURES, data=data_range(df), timings=stage.timings)
+        version = publish(model, model_path, metadata)
+        print(f"💾 Saved model v{version}: {model_path}")
+        version = publish(anom, anomaly_path, {'zone_id': zone, 'features': ANOMALY_FEATURES, 'data': data_range(df)})
+        print(f"💾 Saved anomaly model v{version}: {anomaly_path}")
+    stage.report(f"[{zone}] ")
+    return stage.timings
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train EcoWatt demand and anomaly models")
+    parser.add_argument("--zone", default=None, help="zone to train (default: the default zone)")
+    parser.add_argument("--all-zones", action="store_true", help="train every zone with data")
+    parser.add_argument("--incremental", action="store_true", help="add trees for new rows instead of refitting")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="cores per forest fit (-1 = all)")
+    parser.add_argument("--cv-splits", type=int, default=CV_SPLITS)
+    parser.add_argument("--no-parallel", action="store_true", help="fit models and CV folds in this process")
+    args = parser.parse_args()
+    for zone in (list_zones() if args.all_zones else [args.zone]):
+        train_models(zone, n_jobs=args.n_jobs, cv_splits=args.cv_splits,
+                     incremental=args.incremental, parallel=not args.no_parallel)
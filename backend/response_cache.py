@@ -0,0 +1,54 @@
+import threading
+import time
+
+
+class VersionedCache:
+    """Response cache keyed on a data version, with a TTL as a safety net.
+
+    An entry is served only while the caller's current version equals the
+    version it was computed for, so an append invalidates it on the very
+    next request; the TTL bounds staleness from inputs the version does not
+    capture (e.g. wall-clock time).
+    """
+
+    def __init__(self, ttl=30.0):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    @staticmethod
+    def etag(key, version):
+        return '"' + "-".join(str(v) for v in (key,) + tuple(version)) + '"'
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == version and time.monotonic() - entry[2] < self.ttl:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, key, version, value):
+        with self._lock:
+            self._entries[key] = (version, value, time.monotonic())
+
+    def matches(self, if_none_match, key, version):
+        """True if an ``If-None-Match`` header names the current ETag; counts a 304."""
+        if not if_none_match:
+            return False
+        tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+        if "*" in tags or self.etag(key, version) in tags:
+            with self._lock:
+                self.not_modified += 1
+            return True
+        return False
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "not_modified": self.not_modified,
+                "hit_ratio": round(self.hits / total, 3) if total else 0.0, "ttl_seconds": self.ttl,
+                "entries": len(self._entries)}
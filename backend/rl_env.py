@@ -0,0 +1,142 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from rl_optimizer import QLearningOptimizer
+
+CO2_PER_KWH = 0.8          # kg CO₂ per grid kWh, same factor as /optimize
+CO2_PRICE = 0.05           # cost units per kg CO₂
+PEAK_HOURS = (17, 22)      # [start, end) of the time-of-use peak
+PEAK_PRICE, OFFPEAK_PRICE = 1.0, 0.6
+SPOT_MULTIPLIER = 1.5      # shortfall bought unplanned when committing to solar
+SOLAR_SHARE = np.array([0.0, 1.0, 0.5])  # share of available solar dispatched per action (grid, solar, mix)
+
+
+def grid_price(hour):
+    hour = np.asarray(hour)
+    return np.where((hour >= PEAK_HOURS[0]) & (hour < PEAK_HOURS[1]), PEAK_PRICE, OFFPEAK_PRICE)
+
+
+def dispatch(actions, solar, demand):
+    """Solar and grid kWh used for each action, vectorized."""
+    solar_used = np.minimum(SOLAR_SHARE[actions] * solar, demand)
+    return solar_used, demand - solar_used
+
+
+def rewards(actions, hour, solar, demand):
+    """Negative cost of grid energy plus CO₂.
+
+    Committing to 'solar' plans no grid purchase, so any shortfall is bought
+    unplanned at ``SPOT_MULTIPLIER`` times the tariff; 'mix' and 'grid'
+    schedule their grid share at the normal tariff.
+    """
+    _, grid_kwh = dispatch(actions, solar, demand)
+    price = grid_price(hour) * np.where(actions == 1, SPOT_MULTIPLIER, 1.0)
+    return -(grid_kwh * price + grid_kwh * CO2_PER_KWH * CO2_PRICE)
+
+
+class TelemetryEnv:
+    """Episodes replayed from stored telemetry instead of a synthetic reward.
+
+    Each episode is a ``window``-hour slice of (solar_energy, consumption,
+    hour). Slices come from ``sliding_window_view`` over the store's columns,
+    so all windows share memory with the telemetry and only the sampled batch
+    is gathered. States are a grid of hour bucket × solar level × demand
+    level, with level edges taken from quantiles of the history.
+    """
+
+    def __init__(self, store, window=24, hour_buckets=6, solar_levels=3, demand_levels=3):
+        if len(store) < window + 1:
+            raise ValueError(f"need at least {window + 1} telemetry rows, have {len(store)}")
+        self.window = window
+        self.hour_buckets, self.solar_levels, self.demand_levels = hour_buckets, solar_levels, demand_levels
+        solar = store.column('solar_energy')
+        demand = store.column('consumption')
+        hours = (store.timestamps().astype('int64') // 3600) % 24
+        self.solar_edges = np.quantile(solar[solar > 0], np.linspace(0, 1, solar_levels + 1)[1:-1]) \
+            if np.any(solar > 0) else np.zeros(solar_levels - 1)
+        self.demand_edges = np.quantile(demand, np.linspace(0, 1, demand_levels + 1)[1:-1])
+        self.windows = {
+            'solar': sliding_window_view(solar, window),
+            'demand': sliding_window_view(demand, window),
+            'hour': sliding_window_view(hours, window),
+        }
+
+    @property
+    def n_states(self):
+        return self.hour_buckets * self.solar_levels * self.demand_levels
+
+    @property
+    def n_windows(self):
+        return len(self.windows['hour'])
+
+    def state_index(self, hour, solar, demand):
+        """Flat state index for arrays (or scalars) of hour, solar and demand."""
+        h = np.asarray(hour) * self.hour_buckets // 24
+        s = np.digitize(solar, self.solar_edges)
+        d = np.digitize(demand, self.demand_edges)
+        return (h * self.solar_levels + s) * self.demand_levels + d
+
+    def sample(self, n, rng):
+        """Gather ``n`` random windows as (n, window) arrays."""
+        starts = rng.integers(0, self.n_windows, n)
+        return {k: v[starts] for k, v in self.windows.items()}
+
+
+class TelemetryQAgent:
+    """Tabular Q-learning over a ``TelemetryEnv`` with a compact float32 Q-table."""
+
+    def __init__(self, env, alpha=0.1, gamma=0.9, epsilon=0.1):
+        self.env = env
+        self.actions = QLearningOptimizer().actions
+        self.q_table = np.zeros((env.n_states, len(self.actions)), dtype=np.float32)
+        self.visits = np.zeros(self.q_table.shape, dtype=np.int64)
+        self.alpha, self.gamma, self.epsilon = alpha, gamma, epsilon
+        self.training_episodes = 0
+
+    def train(self, episodes=10000, n_envs=1024, seed=None):
+        """Batched training on sampled telemetry windows (see ``QLearningOptimizer.train_batched``)."""
+        rng = np.random.default_rng(seed)
+        n_states, n_actions = self.q_table.shape
+        remaining = episodes
+        while remaining > 0:
+            n = min(n_envs, remaining)
+            batch = self.env.sample(n, rng)
+            states = self.env.state_index(batch['hour'], batch['solar'], batch['demand'])
+            for t in range(self.env.window):
+                s = states[:, t]
+                greedy = np.argmax(self.q_table[s], axis=1)
+                explore = rng.random(n) < self.epsilon
+                a = np.where(explore, rng.integers(0, n_actions, n), greedy)
+                r = rewards(a, batch['hour'][:, t], batch['solar'][:, t], batch['demand'][:, t])
+                future = self.q_table[states[:, t + 1]].max(axis=1) if t + 1 < self.env.window else 0.0
+                td = r + self.gamma * future - self.q_table[s, a]
+                cells = s * n_actions + a
+                sums = np.bincount(cells, weights=td, minlength=n_states * n_actions)
+                counts = np.bincount(cells, minlength=n_states * n_actions)
+                self.q_table += (self.alpha * sums / np.maximum(counts, 1)).reshape(n_states, n_actions).astype(np.float32)
+                self.visits += counts.reshape(n_states, n_actions)
+            remaining -= n
+            self.training_episodes += n
+        return self.q_table
+
+    def policy(self, hour, solar, demand):
+        """Greedy action per input; never-tried actions are skipped and states never
+        visited in training fall back to the best immediate reward."""
+        hour, solar, demand = np.broadcast_arrays(hour, solar, demand)
+        states = self.env.state_index(hour, solar, demand)
+        q = np.where(self.visits[states] > 0, self.q_table[states], -np.inf)
+        actions = np.arange(len(self.actions))
+        immediate = rewards(actions, hour[..., None], solar[..., None], demand[..., None])
+        return np.where(np.isfinite(q).any(axis=-1), np.argmax(q, axis=-1), np.argmax(immediate, axis=-1))
+
+    def optimize(self, solar_avail, demand, hour):
+        """Same response shape as ``QLearningOptimizer.optimize``, driven by the learned policy."""
+        if demand <= 0:
+            return {'solar_used': 0, 'grid_used': 0, 'renewable_ratio_percent': 0, 'action': 'grid'}
+        action = int(self.policy(hour, solar_avail, demand))
+        solar_used, grid_used = dispatch(np.array(action), solar_avail, demand)
+        return {
+            'solar_used': round(float(solar_used), 2),
+            'grid_used': round(float(grid_used), 2),
+            'renewable_ratio_percent': round(float(solar_used) / demand * 100, 2),
+            'action': self.actions[action]
+        }
@@ -1,5 +1,9 @@
 import numpy as np
 
+# Per-action reward = base - noise * U(0, 1), indexed like QLearningOptimizer.actions
+REWARD_BASE = np.array([4.0, 10.0, 7.0])   # grid, solar, mix
+REWARD_NOISE = np.array([1.0, 2.0, 0.0])
+
 class QLearningOptimizer:
     def __init__(self):
         self.actions = ['grid', 'solar', 'mix']
@@ -8,11 +12,15 @@ class QLearningOptimizer:
         self.gamma = 0.9
         self.epsilon = 0.1
         self.training_episodes = 0
+        self.training_target = 0
 
     def choose_action(self, state):
+        return self.actions[self.choose_action_idx(state)]
+
+    def choose_action_idx(self, state):
         if np.random.uniform(0, 1) < self.epsilon:
-            return np.random.choice(self.actions)
-        return self.actions[np.argmax(self.q_table[state])]
+            return np.random.randint(len(self.actions))
+        return int(np.argmax(self.q_table[state]))
 
     def learn(self, state, action_idx, reward, next_state):
         predict = self.q_table[state, action_idx]
@@ -23,27 +31,71 @@ class QLearningOptimizer:
         total_reward = 0
         for hour in range(24):
             state = hour % 3  # 0: morning, 1: noon, 2: evening
-            action = self.choose_action(state)
-            action_idx = self.actions.index(action)
+            action_idx = self.choose_action_idx(state)
 
             # Reward function: solar = higher reward
-            if action == 'solar':
-                reward = 10 - np.random.uniform(0, 1) * 2
-            elif action == 'mix':
-                reward = 7
-            else:
-                reward = 4 - np.random.uniform(0, 1)
+            reward = REWARD_BASE[action_idx] - REWARD_NOISE[action_idx] * np.random.uniform(0, 1)
             next_state = (hour + 1) % 3
             self.learn(state, action_idx, reward, next_state)
             total_reward += reward
         return total_reward
 
     def train(self, episodes=100):
+        self.training_target = self.training_episodes + episodes
         for _ in range(episodes):
             self.simulate_episode()
-        self.training_episodes += episodes
+            self.training_episodes += 1  # updated per episode so progress can be polled
+        return self.q_table
+
+    def train_batched(self, episodes=100, n_envs=1024, seed=None):
+        """Vectorized trainer: run up to ``n_envs`` independent episodes in lockstep.
+
+        Per hour, exploration draws, actions and rewards for every environment
+        are sampled in bulk and the TD errors are scattered into the Q-table
+        with ``np.bincount``; each (state, action) cell moves by ``alpha``
+        times the mean TD error of the environments that visited it. Episodes
+        are processed in chunks of ``n_envs``, so memory stays flat for
+        million-episode runs. Passing ``seed`` makes the result reproducible.
+        """
+        rng = np.random.default_rng(seed)
+        n_states, n_actions = self.q_table.shape
+        self.training_target = self.training_episodes + episodes
+        remaining = episodes
+        while remaining > 0:
+            n = min(n_envs, remaining)
+            for hour in range(24):
+                states = np.full(n, hour % 3)
+                next_states = np.full(n, (hour + 1) % 3)
+                greedy = np.argmax(self.q_table[states], axis=1)
+                explore = rng.random(n) < self.epsilon
+                actions = np.where(explore, rng.integers(0, n_actions, n), greedy)
+                rewards = REWARD_BASE[actions] - REWARD_NOISE[actions] * rng.random(n)
+
+                targets = rewards + self.gamma * self.q_table[next_states].max(axis=1)
+                td = targets - self.q_table[states, actions]
+                cells = states * n_actions + actions
+                sums = np.bincount(cells, weights=td, minlength=n_states * n_actions)
+                counts = np.bincount(cells, minlength=n_states * n_actions)
+                self.q_table += self.alpha * (sums / np.maximum(counts, 1)).reshape(n_states, n_actions)
+            remaining -= n
+            self.training_episodes += n
         return self.q_table
 
+    def save(self, path):
+        """Persist the Q-table snapshot as .npz."""
+        np.savez(path, q_table=self.q_table, actions=np.array(self.actions),
+                 training_episodes=self.training_episodes)
+
+    def load(self, path):
+        """Restore a snapshot written by ``save``."""
+        with np.load(path) as data:
+            if list(data['actions']) != self.actions or data['q_table'].shape != self.q_table.shape:
+                raise ValueError(f"Q-table snapshot {path} does not match this optimizer")
+            self.q_table = data['q_table'].copy()
+            self.training_episodes = int(data['training_episodes'])
+            self.training_target = self.training_episodes
+        return self
+
     def optimize(self, solar_avail, demand):
         """Predict distribution after training."""
         if demand <= 0:
@@ -60,3 +112,13 @@ class QLearningOptimizer:
             'grid_used': round(grid_used, 2),
             'renewable_ratio_percent': round(ratio * 100, 2)
         }
+
+    def plan(self, solar_forecast, demand_forecast, start_hour=0, prices=None, battery=None):
+        """Day-ahead counterpart of ``optimize``: a whole-horizon schedule with battery storage.
+
+        Takes hourly forecasts (one list, or one row per site) and returns the
+        arrays of ``dispatch.plan_dispatch``. ``optimize`` stays the per-hour,
+        storage-free decision used by /optimize.
+        """
+        from dispatch import plan_dispatch  # dispatch -> rl_env -> rl_optimizer
+        return plan_dispatch(demand_forecast, solar_forecast, start_hour=start_hour, prices=prices, battery=battery)
@@ -0,0 +1,170 @@
+import threading
+import numpy as np
+from storage import COLUMNS, check_zone
+from telemetry_store import get_zone_store
+
+# Bucket width and alignment offset in seconds; weeks start on Monday (the epoch was a Thursday).
+TIERS = {'hourly': (3600, 0), 'daily': (86400, 0), 'weekly': (7 * 86400, 4 * 86400)}
+
+
+class RollupTier:
+    """Per-bucket count/sum/min/max of every column, grown as rows arrive in time order."""
+
+    def __init__(self, seconds, offset=0, columns=COLUMNS, capacity=256):
+        self.seconds, self.offset, self.columns = seconds, offset, columns
+        self.n = 0
+        self.bucket = np.empty(capacity, dtype='int64')
+        self.count = np.empty(capacity, dtype='int64')
+        self.stats = {(c, s): np.empty(capacity) for c in columns for s in ('sum', 'min', 'max')}
+
+    def _grow(self, needed):
+        if needed <= len(self.bucket):
+            return
+        capacity = max(needed, 2 * len(self.bucket))
+        for name in ('bucket', 'count'):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.n] = old[:self.n]
+            setattr(self, name, new)
+        for key, old in self.stats.items():
+            new = np.empty(capacity)
+            new[:self.n] = old[:self.n]
+            self.stats[key] = new
+
+    def add(self, ts, cols):
+        """Fold a time-ordered batch into the tier; the last open bucket is merged, not duplicated."""
+        if len(ts) == 0:
+            return
+        b = (ts - self.offset) // self.seconds
+        starts = np.flatnonzero(np.concatenate([[True], b[1:] != b[:-1]]))
+        buckets = b[starts]
+        counts = np.diff(np.append(starts, len(b)))
+        reduced = {}
+        for c in self.columns:
+            reduced[(c, 'sum')] = np.add.reduceat(cols[c], starts)
+            reduced[(c, 'min')] = np.minimum.reduceat(cols[c], starts)
+            reduced[(c, 'max')] = np.maximum.reduceat(cols[c], starts)
+
+        if self.n and buckets[0] == self.bucket[self.n - 1]:
+            last = self.n - 1
+            self.count[last] += counts[0]
+            for c in self.columns:
+                self.stats[(c, 'sum')][last] += reduced[(c, 'sum')][0]
+                self.stats[(c, 'min')][last] = min(self.stats[(c, 'min')][last], reduced[(c, 'min')][0])
+                self.stats[(c, 'max')][last] = max(self.stats[(c, 'max')][last], reduced[(c, 'max')][0])
+            buckets, counts = buckets[1:], counts[1:]
+            reduced = {k: v[1:] for k, v in reduced.items()}
+
+        k = len(buckets)
+        self._grow(self.n + k)
+        self.bucket[self.n:self.n + k] = buckets
+        self.count[self.n:self.n + k] = counts
+        for key, values in reduced.items():
+            self.stats[key][self.n:self.n + k] = values
+        self.n += k
+
+    def query(self, start, end):
+        """Buckets overlapping ``[start, end]`` as bucket-start timestamps plus mean/min/max per column."""
+        starts = self.bucket[:self.n] * self.seconds + self.offset
+        lo, hi = np.searchsorted(starts, start - self.seconds, 'right'), np.searchsorted(starts, end, 'right')
+        count = self.count[lo:hi]
+        out = {'timestamp': starts[lo:hi]}
+        for c in self.columns:
+            out[c] = {
+                'mean': self.stats[(c, 'sum')][lo:hi] / count,
+                'min': self.stats[(c, 'min')][lo:hi],
+                'max': self.stats[(c, 'max')][lo:hi],
+            }
+        return out
+
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets: indices of ``threshold`` points that keep the shape of ``y``."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n) if threshold >= n else np.linspace(0, n - 1, max(threshold, 0)).astype(int)
+    x = x.astype('float64')
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = edges[i + 1], (edges[i + 2] if i + 2 < len(edges) else n)
+        avg_x, avg_y = x[nxt_lo:nxt_hi].mean(), y[nxt_lo:nxt_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+class Rollups:
+    """Hourly/daily/weekly tiers over the telemetry store, updated on every append."""
+
+    def __init__(self, tiers=TIERS):
+        self.tiers_spec = tiers
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.tiers = {name: RollupTier(sec, off) for name, (sec, off) in self.tiers_spec.items()}
+
+    def attach(self, store):
+        self.store = store
+        store.subscribe(self._on_append)
+        return self
+
+    def _on_append(self, start, end, reset):
+        ts = self.store.epochs()[start:end]
+        cols = {c: self.store.column(c)[start:end] for c in COLUMNS}
+        with self._lock:
+            if reset:
+                self._reset()
+            for tier in self.tiers.values():
+                tier.add(ts, cols)
+
+    def _raw(self, start, end):
+        ts = self.store.epochs()
+        lo, hi = np.searchsorted(ts, start, 'left'), np.searchsorted(ts, end, 'right')
+        out = {'timestamp': ts[lo:hi]}
+        for c in COLUMNS:
+            v = self.store.column(c)[lo:hi]
+            out[c] = {'mean': v, 'min': v, 'max': v}
+        return out
+
+    def series(self, start=None, end=None, max_points=500, column='consumption'):
+        """Finest tier with at most ``max_points`` buckets in range; if even the
+        coarsest has more, it is thinned with LTTB on ``column``'s mean."""
+        ts = self.store.epochs()
+        if len(ts) == 0:
+            return 'raw', {'timestamp': ts}
+        start = ts[0] if start is None else start
+        end = ts[-1] if end is None else end
+        with self._lock:
+            n_raw = np.searchsorted(ts, end, 'right') - np.searchsorted(ts, start, 'left')
+            if n_raw <= max_points:
+                return 'raw', self._raw(start, end)
+            for name, tier in self.tiers.items():
+                data = tier.query(start, end)
+                if len(data['timestamp']) <= max_points:
+                    return name, data
+        keep = lttb(data['timestamp'], data[column]['mean'], max_points)
+        thinned = {'timestamp': data['timestamp'][keep]}
+        for c in COLUMNS:
+            thinned[c] = {k: v[keep] for k, v in data[c].items()}
+        return name + '+lttb', thinned
+
+
+_rollups = {}
+_rollups_lock = threading.Lock()
+
+
+def get_rollups(zone_id=None):
+    """Process-wide rollup tiers of one zone, attached to its telemetry store."""
+    zone_id = check_zone(zone_id)
+    store = get_zone_store(zone_id)
+    with _rollups_lock:
+        rollups = _rollups.get(zone_id)
+        if rollups is None:
+            rollups = _rollups[zone_id] = Rollups().attach(store)
+    return rollups
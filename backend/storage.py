@@ -0,0 +1,420 @@
+import argparse
+import fcntl
+import io
+import json
+import os
+import re
+import zlib
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(__file__)
+CSV_PATH = os.environ.get("ECOWATT_DATA", os.path.join(BASE_DIR, "energy_data.csv"))
+COLUMNAR_PATH = os.path.splitext(CSV_PATH)[0] + ".col"
+ZONES_DIR = os.path.join(BASE_DIR, "zones")  # one partition per zone: <zone_id>.csv or <zone_id>.col
+DEFAULT_ZONE = "default"  # the original single series in energy_data.*
+COLUMNS = ['temperature', 'solar_energy', 'grid_load', 'consumption']
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _fsync_replace(tmp, path):
+    """Flush ``tmp`` to disk, then atomically rename it over ``path``."""
+    with open(tmp, 'rb+') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+@contextmanager
+def _file_lock(path):
+    """Hold an exclusive ``flock`` on ``path`` (created if missing) – shared by every process on the host."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def to_epoch(timestamps):
+    """Convert strings / datetimes to int64 epoch seconds."""
+    return pd.to_datetime(timestamps).values.astype('datetime64[s]').astype('int64')
+
+
+def _parse_rows(data):
+    """Header-less CSV lines to ``{column: array}`` with epoch-second timestamps."""
+    if not data:
+        cols = {c: np.empty(0) for c in COLUMNS}
+        cols['timestamp'] = np.empty(0, dtype='int64')
+        return cols
+    df = pd.read_csv(io.BytesIO(data), names=['timestamp'] + COLUMNS, header=None)
+    cols = {c: df[c].to_numpy(dtype='float64') for c in COLUMNS}
+    cols['timestamp'] = to_epoch(df['timestamp'])
+    return cols
+
+
+class CSVStorage:
+    """Text CSV backend (the original system of record).
+
+    ``append(df, sync=True)`` fsyncs the new lines and then records the
+    committed byte length in a ``<file>.commit`` marker (written atomically);
+    readers stop at that length, so they never see part of a batch. The marker
+    is ignored once the file is replaced by something else (different inode).
+    """
+    kind = 'csv'
+
+    def __init__(self, path=CSV_PATH):
+        self.path = path
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def _marker_path(self):
+        return self.path + ".commit"
+
+    def committed(self):
+        """Byte length readers may consume: the commit marker, else the file size."""
+        st = os.stat(self.path)
+        try:
+            with open(self._marker_path()) as f:
+                marker = json.load(f)
+        except (OSError, ValueError):
+            return st.st_size
+        if marker.get('inode') != st.st_ino or marker.get('bytes', 0) > st.st_size:
+            return st.st_size
+        return marker['bytes']
+
+    def _commit(self, size):
+        tmp = self._marker_path() + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump({'bytes': size, 'inode': os.stat(self.path).st_ino}, f)
+        _fsync_replace(tmp, self._marker_path())
+
+    def read(self):
+        if os.path.exists(self._marker_path()):
+            with open(self.path, 'rb') as f:
+                df = pd.read_csv(io.BytesIO(f.read(self.committed())))
+        else:
+            df = pd.read_csv(self.path)
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        return df
+
+    def write(self, df):
+        df = df.copy()
+        df['timestamp'] = pd.to_datetime(df['timestamp']).dt.strftime(TIMESTAMP_FORMAT)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        df[['timestamp'] + COLUMNS].to_csv(self.path, index=False)
+        if os.path.exists(self._marker_path()):
+            self._commit(os.path.getsize(self.path))
+
+    def append(self, df, sync=False):
+        """Append rows; ``sync=True`` fsyncs them before the commit marker moves.
+
+        Once a marker exists every append goes through it (a plain append
+        would land past the committed length, hidden from readers and
+        truncated by the next durable append).
+        """
+        df = df.copy()
+        df['timestamp'] = pd.to_datetime(df['timestamp']).dt.strftime(TIMESTAMP_FORMAT)
+        if not sync and not os.path.exists(self._marker_path()):
+            df[['timestamp'] + COLUMNS].to_csv(self.path, mode='a', header=not self.exists(), index=False)
+            return
+        if not self.exists():
+            self.write(df.iloc[:0])
+        data = df[['timestamp'] + COLUMNS].to_csv(index=False, header=False).encode()
+        size = self.committed()
+        with open(self.path, 'r+b') as f:
+            # Drop any bytes past the committed length left by a torn append.
+            f.truncate(size)
+            f.seek(size)
+            f.write(data)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        self._commit(size + len(data))
+
+    def lock(self):
+        """Cross-process writer lock (``<file>.lock``); hold it around read-check-append sequences."""
+        return _file_lock(self.path + ".lock")
+
+    def last_epoch(self):
+        """Epoch seconds of the last committed row, or None when there is none."""
+        if not self.exists():
+            return None
+        size = self.committed()
+        start = max(0, size - 4096)
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            chunk = f.read(size - start)
+        end = chunk.rfind(b'\n')
+        last = chunk[:end].rsplit(b'\n', 1)[-1] if end > 0 else b''
+        if not last or last.startswith(b'timestamp'):
+            return None
+        return int(to_epoch([last.split(b',', 1)[0].decode()])[0])
+
+    @staticmethod
+    def _fingerprint(f, offset):
+        """Inode plus a CRC of the bytes at the start and just before ``offset``.
+
+        Appends never touch bytes before ``offset``, so a different value means
+        the file was rewritten or replaced, whatever its new size.
+        """
+        f.seek(0)
+        crc = zlib.crc32(f.read(min(offset, 128)))
+        f.seek(max(0, offset - 128))
+        return (os.fstat(f.fileno()).st_ino, zlib.crc32(f.read(min(offset, 128)), crc))
+
+    def tail(self, cursor):
+        """Parse complete lines after the byte offset held in ``cursor`` (0 to start over).
+
+        Returns ``(reset, columns, new_cursor)``; ``reset`` is True when the file
+        was rewritten and ``columns`` hold the whole file again. The cursor is
+        ``(offset, fingerprint)``, so a rewrite is caught even if the new file
+        is as long as the old one.
+        """
+        offset, fingerprint = cursor or (0, None)
+        size = self.committed()
+        with open(self.path, 'rb') as f:
+            reset = False
+            if offset and (size < offset or self._fingerprint(f, offset) != fingerprint):
+                reset, offset = True, 0
+            f.seek(offset)
+            chunk = f.read(size - offset)
+            # Only consume complete lines; a half-written row is picked up next time.
+            end = chunk.rfind(b'\n') + 1
+            cursor = (offset + end, self._fingerprint(f, offset + end))
+        data = chunk[:end]
+        if offset == 0:
+            data = data[data.find(b'\n') + 1:]
+        if not data:
+            return reset, None, cursor
+        return reset, _parse_rows(data), cursor
+
+    def signature(self):
+        """Cheap change token (inode, mtime, committed length) – no data is read."""
+        st = os.stat(self.path)
+        return (st.st_ino, st.st_mtime_ns, self.committed())
+
+    def rows(self):
+        """Number of committed rows, counted without parsing."""
+        size, count = self.committed(), 0
+        with open(self.path, 'rb') as f:
+            while f.tell() < size:
+                count += f.read(min(1 << 20, size - f.tell())).count(b'\n')
+        return max(0, count - 1)
+
+    def recent(self, n):
+        """Columns of the last ``n`` committed rows, read backwards from the end of the file."""
+        size = self.committed()
+        span = 64 * (n + 2)
+        with open(self.path, 'rb') as f:
+            while True:
+                start = max(0, size - span)
+                f.seek(start)
+                chunk = f.read(size - start)
+                if start == 0 or chunk.count(b'\n') > n + 1:
+                    break
+                span *= 2
+        # The first line is the header or cut off by ``start``; the tail may be a half-written row.
+        lines = chunk[:chunk.rfind(b'\n') + 1].split(b'\n')[1:-1]
+        return _parse_rows(b'\n'.join(lines[-n:]) + b'\n' if n and lines else b'')
+
+
+class ColumnarStorage:
+    """Append-only columnar binary backend.
+
+    A directory holding one little-endian file per column (``timestamp.i64`` as
+    epoch seconds, ``<column>.f32`` for readings) plus ``meta.json`` with the
+    committed row count. Readers memory-map the column files, so they get
+    zero-copy views; appends write to the end of each file and then bump the
+    row count, so their cost does not depend on the dataset size. ``write``
+    bumps a ``generation`` in ``meta.json`` so readers can tell a rewrite from
+    an append.
+    """
+    kind = 'columnar'
+
+    def __init__(self, path=COLUMNAR_PATH):
+        self.path = path
+        self._maps = {}
+        self._mapped = None  # (rows, generation) of the current maps
+
+    def _file(self, name):
+        suffix = 'i64' if name == 'timestamp' else 'f32'
+        return os.path.join(self.path, f"{name}.{suffix}")
+
+    def _meta_path(self):
+        return os.path.join(self.path, "meta.json")
+
+    def exists(self):
+        return os.path.exists(self._meta_path())
+
+    def _meta(self):
+        with open(self._meta_path()) as f:
+            return json.load(f)
+
+    def rows(self):
+        return self._meta()['rows']
+
+    def _commit(self, rows, generation, sync=False):
+        tmp = self._meta_path() + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump({'columns': COLUMNS, 'rows': rows, 'generation': generation}, f)
+        if sync:
+            _fsync_replace(tmp, self._meta_path())
+        else:
+            os.replace(tmp, self._meta_path())
+
+    def write(self, df):
+        generation = self._meta().get('generation', 0) + 1 if self.exists() else 0
+        os.makedirs(self.path, exist_ok=True)
+        for name in ['timestamp'] + COLUMNS:
+            open(self._file(name), 'wb').close()
+        self._commit(0, generation)
+        self.append(df)
+
+    def append(self, df, sync=False):
+        """Append rows; ``sync=True`` fsyncs the column files before the row count is committed."""
+        if not self.exists():
+            self.write(df.iloc[:0])
+        meta = self._meta()
+        n = meta['rows']
+        ts = to_epoch(df['timestamp']).astype('<i8')
+        arrays = {'timestamp': ts}
+        arrays.update({c: df[c].to_numpy(dtype='<f4') for c in COLUMNS})
+        for name, arr in arrays.items():
+            with open(self._file(name), 'r+b') as f:
+                # Drop any bytes past the committed row count left by a torn append.
+                f.truncate(n * arr.itemsize)
+                f.seek(n * arr.itemsize)
+                f.write(arr.tobytes())
+                if sync:
+                    f.flush()
+                    os.fsync(f.fileno())
+        self._commit(n + len(df), meta.get('generation', 0), sync=sync)
+
+    def lock(self):
+        """Cross-process writer lock; see ``CSVStorage.lock``."""
+        return _file_lock(self.path + ".lock")
+
+    def last_epoch(self):
+        """Epoch seconds of the last committed row, or None when there is none."""
+        n = self.rows() if self.exists() else 0
+        if not n:
+            return None
+        with open(self._file('timestamp'), 'rb') as f:
+            f.seek((n - 1) * 8)
+            return int(np.frombuffer(f.read(8), dtype='<i8')[0])
+
+    def columns(self, start=0, end=None):
+        """Zero-copy ``np.memmap`` views of rows ``[start:end]`` keyed by column."""
+        meta = self._meta()
+        n = meta['rows']
+        if (n, meta.get('generation', 0)) != self._mapped:
+            self._maps = {}
+            if n:
+                self._maps['timestamp'] = np.memmap(self._file('timestamp'), dtype='<i8', mode='r', shape=(n,))
+                for c in COLUMNS:
+                    self._maps[c] = np.memmap(self._file(c), dtype='<f4', mode='r', shape=(n,))
+            self._mapped = (n, meta.get('generation', 0))
+        end = n if end is None else end
+        if not self._maps:
+            return {name: np.empty(0, dtype='<i8' if name == 'timestamp' else '<f4')
+                    for name in ['timestamp'] + COLUMNS}
+        return {name: arr[start:end] for name, arr in self._maps.items()}
+
+    def signature(self):
+        """Cheap change token (meta mtime, row count) – no data is read."""
+        return (os.stat(self._meta_path()).st_mtime_ns, self.rows())
+
+    def recent(self, n):
+        """Views of the last ``n`` committed rows."""
+        rows = self.rows()
+        return self.columns(max(0, rows - n), rows)
+
+    def read(self):
+        cols = self.columns()
+        df = pd.DataFrame({c: cols[c] for c in COLUMNS})
+        df.insert(0, 'timestamp', cols['timestamp'].astype('datetime64[s]'))
+        return df
+
+    def tail(self, cursor):
+        """Rows after the row index held in ``cursor``; see ``CSVStorage.tail``.
+
+        The cursor is ``(row, generation, directory inode)``: a ``write`` or a
+        recreated directory resets it even when the row count did not shrink.
+        """
+        meta = self._meta()
+        n, identity = meta['rows'], (meta.get('generation', 0), os.stat(self.path).st_ino)
+        row, seen = (cursor[0], cursor[1:]) if cursor else (0, identity)
+        reset = n < row or seen != identity
+        if reset:
+            row = 0
+        if n == row:
+            return reset, None, (row, *identity)
+        return reset, self.columns(row, n), (n, *identity)
+
+
+_ZONE_ID = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$')
+_SUFFIX = {'csv': '.csv', 'columnar': '.col'}
+
+
+def check_zone(zone_id):
+    """Normalize ``zone_id`` (None means the default zone); raises ValueError if it is not a safe name."""
+    zone_id = zone_id or DEFAULT_ZONE
+    if not _ZONE_ID.match(zone_id):
+        raise ValueError(f"Invalid zone_id: {zone_id!r}")
+    return zone_id
+
+
+def get_storage(kind=None, zone=None):
+    """Storage backend selected by ``kind`` or the ``ECOWATT_STORAGE`` env var (csv | columnar).
+
+    ``zone`` selects that zone's partition under ``ZONES_DIR``; the default
+    zone is the original ``energy_data`` file.
+    """
+    kind = kind or os.environ.get("ECOWATT_STORAGE", "csv")
+    if kind not in _SUFFIX:
+        raise ValueError(f"Unknown storage backend: {kind}")
+    zone = check_zone(zone)
+    if zone == DEFAULT_ZONE:
+        return CSVStorage() if kind == 'csv' else ColumnarStorage()
+    path = os.path.join(ZONES_DIR, zone + _SUFFIX[kind])
+    return CSVStorage(path) if kind == 'csv' else ColumnarStorage(path)
+
+
+def list_zones(kind=None):
+    """Zones with data in the selected backend, the default zone first."""
+    kind = kind or os.environ.get("ECOWATT_STORAGE", "csv")
+    zones = [DEFAULT_ZONE] if get_storage(kind).exists() else []
+    if os.path.isdir(ZONES_DIR):
+        suffix = _SUFFIX[kind]
+        names = sorted(f[:-len(suffix)] for f in os.listdir(ZONES_DIR) if f.endswith(suffix))
+        zones += [z for z in names if _ZONE_ID.match(z) and z != DEFAULT_ZONE and get_storage(kind, z).exists()]
+    return zones
+
+
+def migrate(csv_path=CSV_PATH, columnar_path=COLUMNAR_PATH):
+    """Import an existing CSV into the columnar format."""
+    df = CSVStorage(csv_path).read()
+    ColumnarStorage(columnar_path).write(df)
+    print(f"✅ Migrated {len(df)} rows: {csv_path} -> {columnar_path}")
+
+
+def export(columnar_path=COLUMNAR_PATH, csv_path=CSV_PATH):
+    """Export the columnar store back to CSV."""
+    df = ColumnarStorage(columnar_path).read()
+    CSVStorage(csv_path).write(df)
+    print(f"✅ Exported {len(df)} rows: {columnar_path} -> {csv_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EcoWatt energy_data storage tools")
+    parser.add_argument("command", choices=["migrate", "export"])
+    parser.add_argument("--csv", default=CSV_PATH)
+    parser.add_argument("--columnar", default=COLUMNAR_PATH)
+    args = parser.parse_args()
+    if args.command == "migrate":
+        migrate(args.csv, args.columnar)
+    else:
+        export(args.columnar, args.csv)
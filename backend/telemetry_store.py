@@ -0,0 +1,153 @@
+import threading
+import numpy as np
+from metrics import ROWS_SCANNED, stage
+from storage import COLUMNS, DEFAULT_ZONE, check_zone, get_storage
+
+
+class TelemetryStore:
+    """In-memory columnar copy of the energy_data store that only reads newly appended rows.
+
+    Rows are kept in preallocated NumPy arrays (grown by doubling) so recent
+    windows and lags are plain slices instead of a full-file parse.
+    """
+
+    def __init__(self, storage=None, capacity=4096):
+        self.storage = storage or get_storage()
+        self._lock = threading.Lock()
+        self.generation = 0  # bumped whenever the underlying data is rewritten
+        self._listeners = []
+        self._reset(capacity)
+
+    def _reset(self, capacity=4096):
+        self._capacity = capacity
+        self._ts = np.empty(capacity, dtype='int64')  # epoch seconds
+        self._cols = {c: np.empty(capacity, dtype='float64') for c in COLUMNS}
+        self._n = 0
+        self._cursor = 0
+
+    def _grow(self, needed):
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self._capacity:
+            return
+        ts = np.empty(capacity, dtype='int64')
+        ts[:self._n] = self._ts[:self._n]
+        self._ts = ts
+        for c in COLUMNS:
+            col = np.empty(capacity, dtype='float64')
+            col[:self._n] = self._cols[c][:self._n]
+            self._cols[c] = col
+        self._capacity = capacity
+
+    def refresh(self):
+        """Read rows appended since the last call and return how many were added."""
+        if not self.storage.exists():
+            return 0
+        with self._lock:
+            with stage("storage_read"):
+                reset, cols, cursor = self.storage.tail(self._cursor)
+            if reset:
+                self._reset(self._capacity)
+                self.generation += 1
+            self._cursor = cursor
+            start = self._n
+            added = self._append(cols) if cols is not None else 0
+            ROWS_SCANNED.inc(added, stage="storage_read")
+            if added or reset:
+                for listener in self._listeners:
+                    listener(start, self._n, reset)
+            return added
+
+    def subscribe(self, listener):
+        """Call ``listener(start, end, reset)`` for every batch of appended rows.
+
+        The listener is first replayed over the rows already stored (with
+        ``reset=True``) under the same lock, so it never misses or double-counts
+        a row. Listeners run inside ``refresh`` and must be cheap.
+        """
+        with self._lock:
+            listener(0, self._n, True)
+            self._listeners.append(listener)
+
+    def _append(self, cols):
+        ts = cols['timestamp']
+        k = len(ts)
+        if k == 0:
+            return 0
+        order = None
+        if self._n == 0 and not np.all(ts[1:] >= ts[:-1]):
+            order = np.argsort(ts, kind='stable')
+        self._grow(self._n + k)
+        for dest, src in [(self._ts, ts)] + [(self._cols[c], cols[c]) for c in COLUMNS]:
+            dest[self._n:self._n + k] = src if order is None else src[order]
+        self._n += k
+        return k
+
+    def __len__(self):
+        return self._n
+
+    def column(self, name):
+        """Read-only view of a full column."""
+        view = self._cols[name][:self._n]
+        view.flags.writeable = False
+        return view
+
+    def timestamps(self):
+        return self._ts[:self._n].astype('datetime64[s]')
+
+    def epochs(self):
+        """Read-only view of the int64 epoch-second timestamps."""
+        view = self._ts[:self._n]
+        view.flags.writeable = False
+        return view
+
+    def tail(self, name, n):
+        """View of the last ``n`` values of a column."""
+        return self.column(name)[max(0, self._n - n):]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Process-wide telemetry store, loaded on first use and refreshed on every call."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TelemetryStore()
+    _store.refresh()
+    return _store
+
+
+_zone_stores = {}
+
+
+def get_zone_store(zone_id=None, create=False):
+    """Telemetry store of one zone's partition (the default zone is ``get_store()``), refreshed on every call.
+
+    Raises ValueError for a zone without data unless ``create`` (a writer is
+    about to add some), so unknown ids never leave a cached store behind.
+    """
+    zone_id = check_zone(zone_id)
+    if zone_id == DEFAULT_ZONE:
+        return get_store()
+    with _store_lock:
+        store = _zone_stores.get(zone_id)
+        if store is None:
+            storage = get_storage(zone=zone_id)
+            if not (create or storage.exists()):
+                raise ValueError(f"Unknown zone: {zone_id}")
+            store = _zone_stores[zone_id] = TelemetryStore(storage)
+    store.refresh()
+    return store
+
+
+def loaded_stores():
+    """``{zone_id: store}`` for the stores opened so far, without refreshing them."""
+    with _store_lock:
+        stores = dict(_zone_stores)
+        if _store is not None:
+            stores[DEFAULT_ZONE] = _store
+    return stores
@@ -0,0 +1,21 @@
+import pytest
+from aggregates import PERCENTILES, RollingWindow
+
+
+@pytest.mark.parametrize("value", [104.0, 123.0, -7.5])
+def test_constant_window_percentiles_equal_the_reading(value):
+    window = RollingWindow(24 * 3600)
+    for h in range(24):
+        window.push(h * 3600, (value, 0.0))
+    kpis = window.snapshot()['consumption']
+    assert kpis['min'] == kpis['max'] == value
+    assert [kpis[f'p{p}'] for p in PERCENTILES] == [value] * len(PERCENTILES)
+
+
+def test_percentiles_stay_within_min_and_max():
+    window = RollingWindow(3600 * 1000)
+    for i, v in enumerate([1000.0, 1001.0, 1003.0, 1007.0]):
+        window.push(i, (v, 0.0))
+    kpis = window.snapshot()['consumption']
+    for p in PERCENTILES:
+        assert kpis['min'] <= kpis[f'p{p}'] <= kpis['max']
@@ -0,0 +1,48 @@
+import threading
+import numpy as np
+import pandas as pd
+import anomaly_stream
+from anomaly_stream import StreamingDetector
+from storage import CSVStorage
+from telemetry_store import TelemetryStore
+
+
+def readings(start, consumption):
+    ts = pd.date_range("2025-01-01", periods=len(consumption), freq="h") + pd.Timedelta(hours=start)
+    n = len(consumption)
+    return pd.DataFrame({"timestamp": ts, "temperature": np.full(n, 20.0), "solar_energy": np.full(n, 5.0),
+                         "grid_load": np.full(n, 90.0), "consumption": consumption})
+
+
+class SlowModels:
+    """Zone models whose anomaly model takes until ``release`` is set to load."""
+
+    def __init__(self):
+        self.loading, self.release = threading.Event(), threading.Event()
+
+    def get(self, zone_id, kind):
+        self.loading.set()
+        self.release.wait(5)
+        return None
+
+
+def test_confirmation_runs_outside_the_store_lock(tmp_path, monkeypatch):
+    models = SlowModels()
+    monkeypatch.setattr(anomaly_stream, "get_zone_models", lambda: models)
+    storage = CSVStorage(str(tmp_path / "energy_data.csv"))
+    storage.append(readings(0, 100.0 + np.arange(48) % 3))
+    store = TelemetryStore(storage)
+    detector = StreamingDetector(store).attach()
+    store.refresh()
+
+    storage.append(readings(48, [1000.0]))
+    store.refresh()
+    assert models.loading.wait(5)
+    # The model is still loading, yet the store keeps taking rows.
+    storage.append(readings(49, [101.0]))
+    assert store.refresh() == 1
+
+    models.release.set()
+    detector.drain()
+    events = detector.log.since()
+    assert [(e["consumption"], e["kind"], e["confirmed"]) for e in events] == [(1000.0, "spike", None)]
@@ -0,0 +1,19 @@
+import pandas as pd
+from forecast import hourly_profile
+from storage import CSVStorage
+from telemetry_store import TelemetryStore
+
+
+def test_hourly_profile_covers_days_not_rows(tmp_path):
+    # 15-minute readings: the old last-``days * 24``-rows window saw under two days.
+    # Temperature is 100 on the first three days and 10 afterwards.
+    ts = pd.date_range("2025-01-01", periods=10 * 96, freq="15min")
+    temperature = [100.0 if t < pd.Timestamp("2025-01-04") else 10.0 for t in ts]
+    storage = CSVStorage(str(tmp_path / "energy_data.csv"))
+    storage.append(pd.DataFrame({"timestamp": ts, "temperature": temperature, "solar_energy": 0.0,
+                                 "grid_load": 0.0, "consumption": 0.0}))
+    store = TelemetryStore(storage)
+    store.refresh()
+
+    assert (hourly_profile(store, "temperature", days=7) == 10.0).all()
+    assert (hourly_profile(store, "temperature", days=9) > 10.0).all()
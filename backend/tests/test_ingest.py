@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+from ingest import Ingestor
+from storage import CSVStorage
+
+
+def reading(hour, consumption=100.0):
+    return {"timestamp": f"2025-01-01 {hour:02d}:00:00", "temperature": 20.0, "solar_energy": 5.0,
+            "grid_load": 90.0, "consumption": consumption}
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return CSVStorage(str(tmp_path / "energy_data.csv"))
+
+
+def test_retry_after_failed_flush_loses_nothing(storage, monkeypatch):
+    ingestor = Ingestor(storage, batch_rows=10**6)
+    batch = [reading(h) for h in range(3)]
+    assert ingestor.submit(batch)["accepted"] == 3
+
+    def fail(df, sync=False):
+        raise OSError("disk full")
+    with monkeypatch.context() as m:
+        m.setattr(storage, "append", fail)
+        with pytest.raises(OSError):
+            ingestor.flush()
+
+    # The client retries the whole batch; nothing may be rejected as stale or written twice.
+    assert ingestor.submit(batch) == {"accepted": 3, "rejected": 0, "errors": []}
+    assert ingestor.flush() == 3
+    stored = storage.read()
+    assert list(stored['timestamp']) == list(pd.to_datetime([r["timestamp"] for r in batch]))
+
+
+def test_retry_after_successful_flush_is_idempotent(storage):
+    ingestor = Ingestor(storage, batch_rows=10**6)
+    batch = [reading(h) for h in range(3)]
+    ingestor.submit(batch)
+    assert ingestor.flush() == 3
+
+    result = ingestor.submit(batch + [reading(3)])
+    assert (result["accepted"], result["rejected"]) == (1, 3)
+    ingestor.flush()
+    stored = storage.read()
+    assert len(stored) == 4
+    assert stored['timestamp'].is_unique
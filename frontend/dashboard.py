@@ -1,14 +1,12 @@
 import streamlit as st
 import pandas as pd
-import requests
 import os
 import plotly.express as px
 import numpy as np
 from datetime import datetime, timedelta
 from streamlit_autorefresh import st_autorefresh
 from chatbot_rules import eco_reply   # ✅ NEW: Local EcoBot module
-
-API_URL = "http://127.0.0.1:8000"
+import data_client as api  # pooled session, delta sync and version-keyed caching
 
 # ---------- STREAMLIT CONFIG ----------
 st.set_page_config(layout="wide", page_title="EcoWatt AI – Sustainable City Dashboard")
@@ -35,13 +33,19 @@ col_title.markdown("""
 # ---------- SIDEBAR ----------
 st.sidebar.header("⚙️ Controls")
 selected_view = st.sidebar.radio("Choose View", ["Overview", "Predictions", "City Heatmap", "EcoBot Chat"])
+try:
+    zone_ids = api.zones()
+except Exception:
+    zone_ids = ["default"]
+selected_zone = st.sidebar.selectbox("Zone", zone_ids)
 if st.sidebar.button("🔄 Refresh"):
     st.experimental_rerun()
 
 # ---------- FETCH DATA SAFELY ----------
 try:
-    resp = requests.get(f"{API_URL}/dashboard_data").json()
-except:
+    zone_telemetry, zone_version = api.sync_telemetry(selected_zone)
+    resp = api.dashboard_data(selected_zone, zone_version)
+except Exception:
     st.error("⚠️ Cannot connect to backend API. Please start the FastAPI server first.")
     st.stop()
 
@@ -53,18 +57,29 @@ col3.metric("Renewable Ratio (%)", f"{resp.get('renewable_ratio_percent',0)}%")
 
 # ---------- RENEWABLE FORECAST ----------
 st.markdown("### 🌞 Renewable Energy Forecast (Next 24 Hours)")
-hours = pd.date_range(datetime.now(), periods=24, freq='H')
-solar_forecast = [max(0, 80 * np.sin(((h.hour - 6) / 12) * np.pi) + np.random.normal(0, 5)) for h in hours]
-temp_forecast = [25 + 8 * np.sin((h.hour / 24) * 2 * np.pi) + np.random.normal(0, 1.5) for h in hours]
-
-forecast_df = pd.DataFrame({
-    "Hour": [h.strftime("%H:%M") for h in hours],
-    "Predicted Solar (kWh)": np.round(solar_forecast, 2),
-    "Temperature (°C)": np.round(temp_forecast, 2)
-})
-fig_forecast = px.line(forecast_df, x="Hour", y="Predicted Solar (kWh)",
-                       title="Predicted Solar Generation (Next 24 Hours)",
-                       markers=True, color_discrete_sequence=["green"])
+try:
+    fc = api.forecast(selected_zone, zone_version)
+    forecast_df = pd.DataFrame({
+        "Hour": [ts[11:16] for ts in fc["timestamps"]],
+        "Predicted Solar (kWh)": fc["solar_energy"],
+        "Predicted Demand (kWh)": fc["predicted_consumption"],
+        "Temperature (°C)": fc["temperature"]
+    })
+except Exception:
+    # Backend has no trained model yet: fall back to a simulated solar curve.
+    hours = pd.date_range(datetime.now(), periods=24, freq='H')
+    solar_forecast = [max(0, 80 * np.sin(((h.hour - 6) / 12) * np.pi) + np.random.normal(0, 5)) for h in hours]
+    temp_forecast = [25 + 8 * np.sin((h.hour / 24) * 2 * np.pi) + np.random.normal(0, 1.5) for h in hours]
+    forecast_df = pd.DataFrame({
+        "Hour": [h.strftime("%H:%M") for h in hours],
+        "Predicted Solar (kWh)": np.round(solar_forecast, 2),
+        "Temperature (°C)": np.round(temp_forecast, 2)
+    })
+
+forecast_cols = [c for c in ["Predicted Solar (kWh)", "Predicted Demand (kWh)"] if c in forecast_df]
+fig_forecast = px.line(forecast_df, x="Hour", y=forecast_cols,
+                       title="Predicted Solar Generation & Demand (Next 24 Hours)",
+                       markers=True, color_discrete_sequence=["green", "orange"])
 st.plotly_chart(fig_forecast, use_container_width=True)
 
 # ---------- CARBON CREDIT CALCULATOR ----------
@@ -105,27 +120,34 @@ st.caption("Calculated using renewable usage, CO₂ savings, and efficiency rati
 
 # ---------- CITY HEATMAP ----------
 if selected_view == "City Heatmap":
-    st.markdown("### 🗺 Smart City Energy Efficiency Map (Simulated)")
-    np.random.seed(42)
-    city_zones = [f"Zone-{i}" for i in range(1, 10)]
-    consumption = np.random.uniform(80, 200, len(city_zones))
-    renewable_share = np.random.uniform(20, 90, len(city_zones))
-    efficiency = np.round((renewable_share / (consumption / 100)), 2)
-    df_map = pd.DataFrame({
-        "City Zone": city_zones,
-        "Efficiency Index": efficiency,
-        "Renewable %": renewable_share,
-        "Consumption (kWh)": consumption
-    })
-    fig_map = px.density_heatmap(df_map, x="City Zone", y="Renewable %",
-                                 z="Efficiency Index", color_continuous_scale="Greens",
-                                 title="City-Wide Energy Efficiency Heatmap")
-    st.plotly_chart(fig_map, use_container_width=True)
-    st.caption("Darker green = more efficient, renewable-heavy zones.")
+    st.markdown("### 🗺 Smart City Energy Efficiency Map (last 24h per zone)")
+    try:
+        summary = api.zone_summary()
+    except Exception:
+        summary = {}
+    if not summary.get("zones"):
+        st.info("No zone data yet. Generate zones with `python generator.py --sites 9` in the backend.")
+    else:
+        df_map = pd.DataFrame({
+            "City Zone": summary["zones"],
+            "Efficiency Index": summary["efficiency_index"],
+            "Renewable %": summary["renewable_ratio_percent"],
+            "Consumption (kWh)": summary["avg_consumption"]
+        })
+        fig_map = px.density_heatmap(df_map, x="City Zone", y="Renewable %",
+                                     z="Efficiency Index", color_continuous_scale="Greens",
+                                     title="City-Wide Energy Efficiency Heatmap")
+        st.plotly_chart(fig_map, use_container_width=True)
+        st.dataframe(df_map)
+        st.caption("Darker green = more efficient, renewable-heavy zones.")
 
 # ---------- ANOMALIES ----------
 if selected_view == "Overview":
     st.markdown("---")
+    st.subheader(f"📈 Recent Telemetry ({selected_zone})")
+    recent = zone_telemetry.tail(24 * 7)
+    st.plotly_chart(px.line(recent, x="timestamp", y=["consumption", "solar_energy"],
+                            color_discrete_sequence=["orange", "green"]), use_container_width=True)
     st.subheader("⚠ Detected Anomalies (Energy Spikes)")
     if resp.get("anomalies"):
         anom_df = pd.DataFrame(resp['anomalies'])
@@ -148,11 +170,11 @@ if selected_view == "Predictions":
                 "temperature": float(temp),
                 "solar_energy": float(solar),
                 "grid_load": float(grid_load),
-                "hour": int(hour)
+                "hour": int(hour),
+                "zone_id": selected_zone
             }
-            pred = requests.post(f"{API_URL}/predict_demand", json=payload).json()
-            opt = requests.post(f"{API_URL}/optimize", json=payload).json()
-            st.success(f"Predicted Consumption: {pred.get('predicted_consumption','—')} kWh")
+            opt = api.predict_and_optimize(payload)
+            st.success(f"Predicted Consumption: {opt.get('predicted_consumption','—')} kWh")
             st.metric("Renewable used (kWh)", opt.get("renewable_used_kwh","—"))
             st.metric("Grid used (kWh)", opt.get("grid_used_kwh","—"))
             st.metric("CO₂ saved (kg)", opt.get("co2_saved_kg","—"))
@@ -0,0 +1,94 @@
+import os
+import pandas as pd
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+API_URL = os.environ.get("ECOWATT_API_URL", "http://127.0.0.1:8000")
+TIMEOUT = 5  # seconds per request
+MAX_ROWS = 24 * 30  # telemetry rows kept per zone in the browser session
+
+# ---------- CONNECTION ----------
+@st.cache_resource
+def session():
+    """One pooled keep-alive session per Streamlit server, shared by all reruns."""
+    s = requests.Session()
+    retry = Retry(total=2, backoff_factor=0.2, status_forcelist=(502, 503, 504), allowed_methods=("GET",))
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    return s
+
+@st.cache_resource
+def _etag_cache():
+    return {}
+
+def get_json(path, params=None):
+    """GET with ``If-None-Match``: a 304 from the backend reuses the body we already hold."""
+    key = (path, tuple(sorted((params or {}).items())))
+    cache = _etag_cache()
+    headers = {"If-None-Match": cache[key][0]} if key in cache else {}
+    resp = session().get(f"{API_URL}{path}", params=params, headers=headers, timeout=TIMEOUT)
+    if resp.status_code == 304:
+        return cache[key][1]
+    resp.raise_for_status()
+    body = resp.json()
+    if resp.headers.get("ETag"):
+        cache[key] = (resp.headers["ETag"], body)
+    return body
+
+def post_json(path, payload):
+    resp = session().post(f"{API_URL}{path}", json=payload, timeout=TIMEOUT)
+    resp.raise_for_status()
+    return resp.json()
+
+# ---------- TELEMETRY DELTA SYNC ----------
+def sync_telemetry(zone="default"):
+    """Rows of ``zone`` held in the session, topped up with only those newer than the last cursor.
+
+    Returns ``(frame, version)``; ``version`` is the backend's data version
+    and keys the cached views below, so they refetch only when data changed.
+    """
+    state = st.session_state.setdefault("telemetry", {}).get(zone)
+    params = {"zone": zone, "limit": MAX_ROWS}
+    if state and state["cursor"] is not None:
+        params["since"] = state["cursor"]
+    delta = get_json("/telemetry", params)
+    if "error" in delta:
+        raise RuntimeError(delta["error"])
+    if state and delta["generation"] != state["generation"]:
+        # The backend data was rewritten: start over from a full window.
+        st.session_state["telemetry"].pop(zone, None)
+        return sync_telemetry(zone)
+
+    rows = pd.DataFrame({k: delta[k] for k in ("timestamps", "temperature", "solar_energy", "grid_load", "consumption")})
+    rows = rows.rename(columns={"timestamps": "timestamp"})
+    rows["timestamp"] = pd.to_datetime(rows["timestamp"])
+    frame = rows if not state else pd.concat([state["frame"], rows], ignore_index=True).tail(MAX_ROWS)
+    st.session_state["telemetry"][zone] = {
+        "frame": frame, "cursor": delta["cursor"], "generation": delta["generation"]
+    }
+    return frame, tuple(delta["version"])
+
+# ---------- VERSION-KEYED VIEWS ----------
+# ``version`` is unused in the bodies but part of the cache key: a new
+# data version is a cache miss, an unchanged one costs no request at all.
+@st.cache_data(max_entries=16, show_spinner=False)
+def dashboard_data(zone, version):
+    return get_json("/dashboard_data", {"zone": zone})
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def forecast(zone, version, horizon=24):
+    return get_json("/forecast", {"horizon": horizon, "zone": zone})
+
+@st.cache_data(ttl=60, show_spinner=False)
+def zones():
+    return get_json("/zones").get("zones") or ["default"]
+
+def zone_summary():
+    return get_json("/zones/summary")  # ETag-validated: a 304 when no zone changed
+
+def predict_and_optimize(payload):
+    """One round trip: /optimize already returns the demand prediction it optimized for."""
+    return post_json("/optimize", payload)